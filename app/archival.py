@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from app.db import AsyncSessionLocal
+from app.services.task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+TASK_ARCHIVE_AFTER_DAYS = float(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "30"))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", "1000"))
+TASK_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("TASK_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+
+async def archive_done_tasks() -> int:
+    """
+    Один проход архивации выполненных задач с настройками из окружения.
+
+    Returns:
+        int: Количество перенесённых задач
+    """
+    async with AsyncSessionLocal() as db:
+        return await TaskService(db, "admin").archive_done_tasks(
+            older_than=timedelta(days=TASK_ARCHIVE_AFTER_DAYS),
+            batch_size=TASK_ARCHIVE_BATCH_SIZE,
+        )
+
+
+async def run_archival(interval: float = TASK_ARCHIVE_INTERVAL_SECONDS):
+    """
+    Фоновая задача: периодически архивирует выполненные задачи.
+
+    Args:
+        interval (float): Интервал между проходами в секундах
+    """
+    while True:
+        try:
+            archived = await archive_done_tasks()
+        except Exception:
+            logger.exception("Ошибка архивации задач")
+        else:
+            if archived:
+                logger.info("Перенесено в архив задач: %d", archived)  # noqa: WPS323
+        await asyncio.sleep(interval)
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+import os
+
+from app.db import AsyncSessionLocal
+from app.services.task_changes_service import TaskChangesService
+
+logger = logging.getLogger(__name__)
+
+CHANGES_TOMBSTONE_PURGE_BATCH_SIZE = int(os.getenv("CHANGES_TOMBSTONE_PURGE_BATCH_SIZE", "1000"))
+CHANGES_TOMBSTONE_PURGE_INTERVAL_SECONDS = float(os.getenv("CHANGES_TOMBSTONE_PURGE_INTERVAL_SECONDS", "3600"))
+
+
+async def purge_tombstones() -> int:
+    """
+    Один проход удаления отметок ленты изменений старше срока хранения.
+
+    Returns:
+        int: Количество удалённых отметок
+    """
+    async with AsyncSessionLocal() as db:
+        return await TaskChangesService(db, "admin").purge_tombstones(CHANGES_TOMBSTONE_PURGE_BATCH_SIZE)
+
+
+async def run_tombstone_purge(interval: float = CHANGES_TOMBSTONE_PURGE_INTERVAL_SECONDS):
+    """
+    Фоновая задача: периодически удаляет устаревшие отметки ленты изменений.
+
+    Args:
+        interval (float): Интервал между проходами в секундах
+    """
+    while True:
+        try:
+            purged = await purge_tombstones()
+        except Exception:
+            logger.exception("Ошибка удаления отметок ленты изменений")
+        else:
+            if purged:
+                logger.info("Удалено отметок ленты изменений: %d", purged)  # noqa: WPS323
+        await asyncio.sleep(interval)
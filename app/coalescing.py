@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.events import broker
+
+LIST_TASKS_CACHE_TTL_MS = float(os.getenv("LIST_TASKS_CACHE_TTL_MS", "0"))
+LIST_TASKS_CACHE_MAX_ENTRIES = int(os.getenv("LIST_TASKS_CACHE_MAX_ENTRIES", "10000"))
+
+FlightKey = Tuple[Hashable, ...]
+Loader = Callable[[], Awaitable[Any]]
+Flights = Dict[Hashable, asyncio.Future]
+Entries = Dict[Hashable, Tuple[float, Any]]
+
+_FAILED = object()
+_MISSING = object()
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые чтения в одно выполнение.
+
+    Ключи — кортежи, первый элемент которых ID владельца: записи хранятся
+    по владельцам, и после изменений задач сбрасываются только его записи.
+    """
+
+    def __init__(self, ttl: float = 0, max_entries: int = LIST_TASKS_CACHE_MAX_ENTRIES):
+        """
+        Инициализация.
+
+        Args:
+            ttl (float): Сколько секунд отдавать готовый результат без запроса. 0 — не кэшировать
+            max_entries (int): Размер кэша, после которого удаляются устаревшие записи
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight: Dict[Hashable, Flights] = {}
+        self._cache: Dict[Hashable, Entries] = {}
+        self._cached = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, key: FlightKey, fn: Loader) -> Any:
+        """
+        Возвращает результат fn, выполняя его один раз для одновременных вызовов с ключом.
+
+        Если выполнение завершилось ошибкой или было отменено, ожидающие вызовы
+        повторяют его сами.
+
+        Args:
+            key (FlightKey): Ключ запроса, первый элемент — ID владельца
+            fn (Loader): Выполнение запроса
+
+        Returns:
+            Any: Результат fn
+        """
+        while True:
+            cached = self._cached_result(key)
+            if cached is not _MISSING:
+                return cached
+
+            leader = self._in_flight.get(key[0], {}).get(key)
+            if leader is None:
+                return await self._lead(key, fn)
+            result = await asyncio.shield(leader)
+            if result is not _FAILED:
+                self.coalesced += 1
+                return result
+
+    def invalidate(self, owner_id: str):
+        """
+        Сбрасывает результаты владельца.
+
+        Уже ожидающие вызовы получат текущий результат, новые выполнят запрос заново.
+
+        Args:
+            owner_id (str): ID владельца
+        """
+        self._in_flight.pop(owner_id, None)
+        self._cached -= len(self._cache.pop(owner_id, {}))
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счётчики объединения запросов."""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "in_flight": sum(len(flights) for flights in self._in_flight.values()),
+            "cached": self._cached,
+        }
+
+    def _cached_result(self, key: FlightKey) -> Any:
+        cached = self._cache.get(key[0], {}).get(key)
+        if cached is None or cached[0] <= time.monotonic():
+            return _MISSING
+        self.cache_hits += 1
+        return cached[1]
+
+    async def _lead(self, key: FlightKey, fn: Loader) -> Any:
+        leader = asyncio.get_running_loop().create_future()
+        self._in_flight.setdefault(key[0], {})[key] = leader
+        self.executed += 1
+        result = _FAILED
+        try:  # noqa: WPS501
+            result = await fn()
+        finally:
+            # Если владельца сбросили во время запроса, результат мог устареть: не кэшируем.
+            if _remove_flight(self._in_flight, key, leader):
+                self._store(key, result)
+            leader.set_result(result)
+        return result
+
+    def _store(self, key: FlightKey, result: Any):
+        if self.ttl <= 0 or result is _FAILED:
+            return
+        now = time.monotonic()
+        if self._cached >= self.max_entries:
+            self._cache = _unexpired(self._cache, now)
+            self._cached = sum(len(owner_entries) for owner_entries in self._cache.values())
+        if self._cached >= self.max_entries:
+            return
+        entries = self._cache.setdefault(key[0], {})
+        if key not in entries:
+            self._cached += 1
+        entries[key] = (now + self.ttl, result)
+
+
+def _remove_flight(in_flight: Dict[Hashable, Flights], key: FlightKey, leader: asyncio.Future) -> bool:
+    flights = in_flight.get(key[0], {})
+    if flights.get(key) is not leader:
+        return False
+    flights.pop(key)
+    if not flights:
+        in_flight.pop(key[0])
+    return True
+
+
+def _unexpired(cache: Dict[Hashable, Entries], now: float) -> Dict[Hashable, Entries]:
+    alive_cache: Dict[Hashable, Entries] = {}
+    for owner_id, owner_entries in cache.items():
+        for key, entry in owner_entries.items():
+            if entry[0] > now:
+                alive_cache.setdefault(owner_id, {})[key] = entry
+    return alive_cache
+
+
+list_tasks_flight = SingleFlight(ttl=LIST_TASKS_CACHE_TTL_MS / 1000)
+broker.add_listener(lambda event: list_tasks_flight.invalidate(event.owner_id))
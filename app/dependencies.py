@@ -4,6 +4,9 @@ from collections.abc import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import AsyncSessionLocal
+from app.idempotency import IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_LOCK_TIMEOUT
+from app.services.idempotency_service import IdempotencyService
+from app.services.task_changes_service import TaskChangesService
 from app.services.task_service import TaskService
 
 
@@ -37,3 +40,19 @@ def get_task_service(
 ) -> TaskService:
     """Возвращает TaskService с привязанным db."""
     return TaskService(db, user_id)
+
+
+def get_idempotency_service(
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+) -> IdempotencyService:
+    """Возвращает IdempotencyService с привязанным db и настройками ключей."""
+    return IdempotencyService(db, user_id, ttl=IDEMPOTENCY_KEY_TTL, lock_timeout=IDEMPOTENCY_LOCK_TIMEOUT)
+
+
+def get_task_changes_service(
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+) -> TaskChangesService:
+    """Возвращает TaskChangesService с привязанным db."""
+    return TaskChangesService(db, user_id)
@@ -0,0 +1,394 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import DATABASE_URL
+from app.schemas import TaskEvent, TaskEventType
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "local")
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "256"))
+TASK_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("TASK_EVENTS_HEARTBEAT_SECONDS", "15"))
+TASK_EVENTS_RECONNECT_MIN_SECONDS = 1
+TASK_EVENTS_RECONNECT_MAX_SECONDS = 30
+TASK_EVENTS_CHANNEL = "task_events"
+
+RESYNC_MESSAGE = "event: resync\ndata: {}\n\n"
+HEARTBEAT_MESSAGE = ": ping\n\n"
+
+
+class TaskEventSubscription:
+    """Подписка одного клиента на события задач владельца."""
+
+    def __init__(self, owner_id: str, queue_size: int):
+        """
+        Инициализация подписки.
+
+        Args:
+            owner_id (str): ID владельца задач
+            queue_size (int): Максимальное число недоставленных сообщений
+        """
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+class TaskEventBroker:
+    """Внутрипроцессный брокер событий задач с разбиением по владельцам."""
+
+    def __init__(self, queue_size: int = TASK_EVENTS_QUEUE_SIZE):
+        """
+        Инициализация брокера.
+
+        Args:
+            queue_size (int): Размер очереди каждой подписки
+        """
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, Set[TaskEventSubscription]] = defaultdict(set)
+        self._listeners: List[Callable[[TaskEvent], None]] = []
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, owner_id: str) -> TaskEventSubscription:
+        """
+        Подписывает клиента на события задач владельца.
+
+        Args:
+            owner_id (str): ID владельца задач
+
+        Returns:
+            TaskEventSubscription: Подписка
+        """
+        subscription = TaskEventSubscription(owner_id, self.queue_size)
+        self.subscribers[owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TaskEventSubscription):
+        """
+        Отписывает клиента.
+
+        Args:
+            subscription (TaskEventSubscription): Подписка
+        """
+        subs = self.subscribers.get(subscription.owner_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            self.subscribers.pop(subscription.owner_id)
+
+    def add_listener(self, listener: Callable[[TaskEvent], None]):
+        """
+        Регистрирует обработчик всех событий воркера, независимо от владельца.
+
+        Args:
+            listener (Callable[[TaskEvent], None]): Синхронный обработчик
+        """
+        self._listeners.append(listener)
+
+    def notify_listeners(self, event: TaskEvent):
+        """
+        Вызывает обработчики всех событий воркера, не трогая подписки клиентов.
+
+        Args:
+            event (TaskEvent): Событие
+        """
+        for listener in self._listeners:
+            listener(event)
+
+    def publish(self, event: TaskEvent) -> int:
+        """
+        Рассылает событие подписчикам владельца задачи.
+
+        Сообщение сериализуется один раз и разделяется всеми очередями.
+        Если очередь подписчика переполнена, его сообщения отбрасываются,
+        а клиенту отправляется `resync`: он должен дочитать изменения через
+        ленту `/tasks/changes`.
+
+        Args:
+            event (TaskEvent): Событие
+
+        Returns:
+            int: Количество подписчиков, получивших событие
+        """
+        self.published += 1
+        self.notify_listeners(event)
+
+        subs = self.subscribers.get(event.owner_id)
+        if not subs:
+            return 0
+
+        message = f"event: task\ndata: {event.model_dump_json()}\n\n"
+        delivered = 0
+        for subscription in subs:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.overflow(subscription)
+                continue
+            delivered += 1
+
+        self.delivered += delivered
+        return delivered
+
+    def overflow(self, subscription: TaskEventSubscription):
+        """
+        Отбрасывает недоставленные сообщения подписки и просит клиента пересинхронизироваться.
+
+        Args:
+            subscription (TaskEventSubscription): Подписка
+        """
+        subscription.overflowed = True
+        self.dropped += subscription.queue.qsize()
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+
+broker = TaskEventBroker()
+
+
+def broker_stats(task_broker: TaskEventBroker) -> Dict[str, int]:
+    """
+    Возвращает счётчики брокера.
+
+    Args:
+        task_broker (TaskEventBroker): Брокер
+
+    Returns:
+        Dict[str, int]: Подписки, владельцы и счётчики сообщений
+    """
+    return {
+        "connections": sum(len(subs) for subs in task_broker.subscribers.values()),
+        "owners": len(task_broker.subscribers),
+        "published": task_broker.published,
+        "delivered": task_broker.delivered,
+        "dropped": task_broker.dropped,
+    }
+
+
+def send_heartbeat(task_broker: TaskEventBroker):
+    """
+    Кладёт keep-alive комментарий в пустые очереди подписок.
+
+    Args:
+        task_broker (TaskEventBroker): Брокер
+    """
+    for subs in task_broker.subscribers.values():
+        for subscription in subs:
+            if subscription.queue.empty():
+                subscription.queue.put_nowait(HEARTBEAT_MESSAGE)
+
+
+async def run_heartbeat(interval: float = TASK_EVENTS_HEARTBEAT_SECONDS):
+    """
+    Фоновая задача: периодически рассылает keep-alive всем подпискам.
+
+    Один таймер на воркер вместо таймера на каждое ожидание в потоке.
+
+    Args:
+        interval (float): Интервал в секундах
+    """
+    while True:  # noqa: WPS457
+        await asyncio.sleep(interval)
+        send_heartbeat(broker)
+
+
+def resync_all(task_broker: TaskEventBroker):
+    """
+    Просит всех подписчиков пересинхронизироваться: часть событий могла потеряться.
+
+    Args:
+        task_broker (TaskEventBroker): Брокер
+    """
+    for subs in task_broker.subscribers.values():
+        for subscription in subs:
+            if not subscription.overflowed:
+                task_broker.overflow(subscription)
+
+
+async def stream_task_events(owner_id: str) -> AsyncIterator[str]:
+    """
+    Подписывается на события задач владельца и отдаёт их в формате Server-Sent Events.
+
+    Подписка создаётся при первом чтении потока и снимается при его закрытии,
+    поэтому поток, который так и не начали читать, не оставляет подписки.
+
+    Args:
+        owner_id (str): ID владельца задач
+
+    Yields:
+        str: Фрагмент потока SSE
+    """
+    subscription = broker.subscribe(owner_id)
+    try:  # noqa: WPS501
+        async for chunk in _read_chunks(subscription):
+            yield chunk
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def _read_chunks(subscription: TaskEventSubscription) -> AsyncIterator[str]:
+    resync = False
+    while not resync:
+        messages = await _drain(subscription.queue)
+        resync = messages[-1] is None
+        chunk = "".join(filter(None, messages))
+        if chunk:
+            yield chunk
+    yield RESYNC_MESSAGE
+
+
+async def _drain(queue: asyncio.Queue) -> List[Optional[str]]:
+    # Все накопившиеся в очереди сообщения отправляются одним куском; None — сигнал resync.
+    messages = [await queue.get()]
+    while messages[-1] is not None and not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def _task_events(event_type: TaskEventType, tasks: Iterable[Any]) -> List[TaskEvent]:
+    return [
+        TaskEvent(type=event_type, task_id=task.id, owner_id=task.owner_id)
+        for task in tasks
+    ]
+
+
+async def notify_task_events(db: AsyncSession, event_type: TaskEventType, tasks: Iterable[Any]):
+    """
+    Ставит события задач в транзакцию записи; вызывается до её коммита.
+
+    При `TASK_EVENTS_BACKEND=postgres` события отправляются через NOTIFY одним
+    запросом в той же транзакции: PostgreSQL доставит их всем воркерам ровно
+    в момент коммита, а при откате — не доставит. Для локального брокера ничего
+    не делает, доставку выполняет `dispatch_task_events` после коммита.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия БД
+        event_type (TaskEventType): Тип события
+        tasks (Iterable[Any]): Изменённые задачи
+    """
+    if TASK_EVENTS_BACKEND != "postgres":
+        return
+
+    events = _task_events(event_type, tasks)
+    if not events:
+        return
+
+    await db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {
+            "channel": TASK_EVENTS_CHANNEL,
+            "payloads": [event.model_dump_json() for event in events],
+        },
+    )
+
+
+def dispatch_task_events(event_type: TaskEventType, tasks: Iterable[Any]):
+    """
+    Доставляет события задач во внутрипроцессный брокер после коммита.
+
+    При `TASK_EVENTS_BACKEND=postgres` подписчики получат события через LISTEN,
+    а здесь синхронно вызываются только обработчики воркера: так его кэши
+    сбрасываются до ответа на запрос, и следующее чтение видит изменение.
+
+    Args:
+        event_type (TaskEventType): Тип события
+        tasks (Iterable[Any]): Изменённые задачи
+    """
+    for event in _task_events(event_type, tasks):
+        if TASK_EVENTS_BACKEND == "postgres":
+            broker.notify_listeners(event)
+        else:
+            broker.publish(event)
+
+
+class PgTaskEventListener:
+    """Слушатель LISTEN/NOTIFY, пересылающий события во внутрипроцессный брокер.
+
+    Если соединение обрывается, слушатель переподключается с экспоненциальной
+    задержкой, а подписчикам отправляется `resync`: события за время разрыва потеряны.
+    """
+
+    def __init__(self, dsn: Optional[str] = None):
+        """
+        Инициализация слушателя.
+
+        Args:
+            dsn (Optional[str]): DSN PostgreSQL. По умолчанию берётся из DATABASE_URL
+        """
+        self.dsn = dsn or make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(
+            hide_password=False,
+        )
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def start(self):
+        """Открывает отдельное соединение и подписывается на канал."""
+        try:
+            await self._connect()
+        except Exception:
+            logger.exception("Не удалось подключить слушатель событий задач")
+            self._schedule_reconnect()
+
+    async def stop(self):
+        """Закрывает соединение слушателя."""
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self):
+        conn = await asyncpg.connect(self.dsn)
+        conn.add_termination_listener(self._on_terminate)
+        await conn.add_listener(TASK_EVENTS_CHANNEL, _forward_notification)
+        self._conn = conn
+
+    def _on_terminate(self, conn):
+        if self._closing:
+            return
+        logger.warning("Соединение слушателя событий задач закрыто, переподключение")
+        self._conn = None
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        delay = TASK_EVENTS_RECONNECT_MIN_SECONDS
+        while not self._closing:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except Exception:
+                logger.exception("Не удалось переподключить слушатель событий задач")
+                delay = min(delay * 2, TASK_EVENTS_RECONNECT_MAX_SECONDS)
+                continue
+            resync_all(broker)
+            return
+
+
+def _forward_notification(conn, pid, channel, payload: str):
+    try:
+        event = TaskEvent.model_validate(json.loads(payload))
+    except ValueError:
+        logger.warning("Некорректное событие задачи: %s", payload)  # noqa: WPS323
+        return
+    broker.publish(event)
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from app.db import AsyncSessionLocal
+from app.services.idempotency_service import IdempotencyService
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_TTL = timedelta(seconds=float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400")))
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "35")))
+IDEMPOTENCY_PURGE_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "1000"))
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "600"))
+
+
+async def purge_expired_keys() -> int:
+    """
+    Один проход удаления просроченных ключей идемпотентности.
+
+    Returns:
+        int: Количество удалённых ключей
+    """
+    async with AsyncSessionLocal() as db:
+        service = IdempotencyService(
+            db, "admin", ttl=IDEMPOTENCY_KEY_TTL, lock_timeout=IDEMPOTENCY_LOCK_TIMEOUT,
+        )
+        return await service.purge_expired(IDEMPOTENCY_PURGE_BATCH_SIZE)
+
+
+async def run_idempotency_purge(interval: float = IDEMPOTENCY_PURGE_INTERVAL_SECONDS):
+    """
+    Фоновая задача: периодически удаляет просроченные ключи идемпотентности.
+
+    Args:
+        interval (float): Интервал между проходами в секундах
+    """
+    while True:
+        try:
+            purged = await purge_expired_keys()
+        except Exception:
+            logger.exception("Ошибка удаления ключей идемпотентности")
+        else:
+            if purged:
+                logger.info("Удалено ключей идемпотентности: %d", purged)  # noqa: WPS323
+        await asyncio.sleep(interval)
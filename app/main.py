@@ -1,15 +1,35 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from app.archival import TASK_ARCHIVE_INTERVAL_SECONDS, run_archival
+from app.changes import CHANGES_TOMBSTONE_PURGE_INTERVAL_SECONDS, run_tombstone_purge
 from app.db import engine, Base
-from app.routers import tasks, health
+from app.events import TASK_EVENTS_BACKEND, PgTaskEventListener, run_heartbeat
+from app.idempotency import IDEMPOTENCY_PURGE_INTERVAL_SECONDS, run_idempotency_purge
+from app.routers import tasks, health, sync
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan приложение: создание таблиц при старте."""
+    """Lifespan приложение: создание таблиц, запуск слушателя событий и архивации при старте."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+    listener = PgTaskEventListener() if TASK_EVENTS_BACKEND == "postgres" else None
+    if listener:
+        await listener.start()
+    background = [asyncio.create_task(run_heartbeat())]
+    if TASK_ARCHIVE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_archival()))
+    if IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_idempotency_purge()))
+    if CHANGES_TOMBSTONE_PURGE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_tombstone_purge()))
     yield
+    for job in background:
+        job.cancel()
+    if listener:
+        await listener.stop()
 
 
 app = FastAPI(
@@ -20,4 +40,5 @@ app = FastAPI(
 )
 
 app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(sync.router, prefix="/tasks", tags=["tasks"])
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Text, DateTime, Enum, Boolean
+from sqlalchemy import Column, Index, func, text
+from sqlalchemy.types import Boolean, DateTime, Enum, Integer, String, Text
+from sqlalchemy.orm import declarative_mixin, declared_attr
 import enum
 from app.models.base import BaseModelMixin
 from app.db import Base
@@ -13,10 +15,9 @@ class StatusEnum(str, enum.Enum):
     OVERDUE = "overdue"
 
 
-class Task(Base, BaseModelMixin):
-    """Модель задачи."""
-
-    __tablename__ = "tasks"
+@declarative_mixin
+class TaskFieldsMixin:
+    """Поля задачи, общие для активной и архивной таблиц."""
 
     owner_id = Column(String, index=True, nullable=False)
     title = Column(String, nullable=False)
@@ -24,3 +25,35 @@ class Task(Base, BaseModelMixin):
     status = Column(Enum(StatusEnum), default=StatusEnum.TODO, nullable=False)
     due_date = Column(DateTime(timezone=True), nullable=True)
     is_overdue = Column(Boolean, default=False, nullable=False)
+    version = Column(Integer, server_default="1", nullable=False)
+
+
+class Task(Base, BaseModelMixin, TaskFieldsMixin):
+    """Модель задачи."""
+
+    __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_owner_updated", "owner_id", "updated_at", "id"),
+        Index(
+            "ix_tasks_done_updated",
+            "updated_at",
+            postgresql_where=text("status = 'DONE'"),
+        ),
+    )
+
+    @declared_attr
+    def __mapper_args__(cls):
+        """Включает проверку версии при UPDATE."""
+        return {"version_id_col": cls.__table__.c.version}
+
+
+class TaskArchive(Base, BaseModelMixin, TaskFieldsMixin):
+    """Архивная задача: выполненная задача, перенесённая из активной таблицы."""
+
+    __tablename__ = "tasks_archive"
+
+    archived_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
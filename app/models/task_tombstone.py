@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+
+from app.db import Base
+
+
+class TaskTombstone(Base):
+    """Отметка о задаче, ушедшей из активной таблицы: удалённой или перенесённой в архив."""
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_owner_deleted", "owner_id", "deleted_at", "id"),
+        Index("ix_task_tombstones_deleted_at", "deleted_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(String, nullable=False)
+    reason = Column(String, default="deleted", server_default="deleted", nullable=False)
+    deleted_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 
+from app.coalescing import list_tasks_flight
+from app.events import broker, broker_stats
+
 router = APIRouter()
 
 
@@ -7,3 +10,15 @@ router = APIRouter()
 def health():
     """Проверяет работу сервера."""
     return {"status": "ok"}
+
+
+@router.get("/events")
+def events_stats():
+    """Возвращает счётчики push-канала событий задач."""
+    return broker_stats(broker)
+
+
+@router.get("/coalescing")
+def coalescing_stats():
+    """Возвращает счётчики объединения одинаковых запросов списка задач."""
+    return list_tasks_flight.stats()
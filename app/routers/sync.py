@@ -0,0 +1,70 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import get_current_user, get_task_changes_service
+from app.events import stream_task_events
+from app.schemas import TaskChangesOut
+from app.services.task_changes_service import ChangesTokenExpiredError, TaskChangesService
+
+
+router = APIRouter()
+
+
+@router.get("/changes", response_model=TaskChangesOut)
+async def list_changes_endpoint(
+    since: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    changes_service: TaskChangesService = Depends(get_task_changes_service),
+) -> TaskChangesOut:
+    """Получает изменения задач текущего пользователя после токена синхронизации.
+
+    Args:
+        since (Optional[str]): Токен из предыдущего ответа. Defaults to Query(None).
+        limit (int): Размер пачки. Defaults to Query(100, ge=1, le=1000).
+
+    Raises:
+        HTTPException: Токен устарел, нужна полная синхронизация (410)
+        HTTPException: Некорректный токен (422)
+
+    Returns:
+        TaskChangesOut: Изменённые и удалённые задачи с токеном продолжения
+    """
+    try:
+        updated, deleted, token, has_more = await changes_service.list_changes(
+            since=since,
+            limit=limit,
+        )
+    except ChangesTokenExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return TaskChangesOut.model_validate(
+        {
+            "updated": updated,
+            "deleted": deleted,
+            "next_token": token,
+            "has_more": has_more,
+        },
+        from_attributes=True,
+    )
+
+
+@router.get("/events")
+async def task_events_endpoint(
+    user_id: str = Depends(get_current_user),
+) -> StreamingResponse:
+    """Открывает поток Server-Sent Events с изменениями задач текущего пользователя.
+
+    Поток не держит соединение с БД. При событии `resync` клиент должен
+    дочитать изменения через `/tasks/changes` и переподключиться.
+
+    Returns:
+        StreamingResponse: Поток событий `text/event-stream`
+    """
+    return StreamingResponse(
+        stream_task_events(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
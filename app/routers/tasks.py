@@ -1,58 +1,118 @@
-from datetime import datetime
-from typing import Optional, List, Sequence
-
-from fastapi import APIRouter, Depends, HTTPException, Query
-
-from app.services.task_service import TaskService
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Optional, List, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import TypeAdapter
+
+from app.archival import TASK_ARCHIVE_AFTER_DAYS, TASK_ARCHIVE_BATCH_SIZE
+from app.coalescing import list_tasks_flight
+from app.services.idempotency_service import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    IdempotencyService,
+    ResponseRecorder,
+    hash_request,
+)
+from app.services.task_service import TaskConflictError, TaskNotFoundError, TaskService
 from app.schemas import TaskCreate, TaskOut, TaskUpdate
-from app.models.task import Task
-from app.dependencies import get_task_service
+from app.models.task import StatusEnum, Task, TaskArchive
+from app.dependencies import get_idempotency_service, get_task_service
 
 
 router = APIRouter()
 
+task_list_adapter = TypeAdapter(List[TaskOut])
+
 
 @router.post("/", response_model=TaskOut, status_code=201)
 async def create_task_endpoint(
     task_in: TaskCreate,
+    idempotency_key: Optional[str] = Header(None),
     task_service: TaskService = Depends(get_task_service),
-) -> Optional[Task]:
+    idempotency_service: IdempotencyService = Depends(get_idempotency_service),
+) -> Union[Task, Response]:
     """Создаёт задачу для текущего пользователя.
 
+    С заголовком `Idempotency-Key` повтор запроса возвращает сохранённый ответ
+    без повторного создания задачи.
+
     Args:
         task_in (TaskCreate): Описание задачи
+        idempotency_key (Optional[str]): Ключ идемпотентности. Defaults to Header(None).
 
     Raises:
-        HTTPException: Неверный формат запроса
+        HTTPException: Неверный формат запроса (422)
+        HTTPException: Ключ использован с другим запросом (422)
+        HTTPException: Запрос с ключом ещё выполняется (409)
 
     Returns:
-        Optional[Task]: Созданная задача
+        Union[Task, Response]: Созданная задача
     """
+    if not idempotency_key:
+        return await _create_task(task_service, task_in)
+
     try:
-        task = await task_service.create_task(task_in=task_in)
+        status_code, body, replayed = await idempotency_service.run(
+            key=idempotency_key,
+            request_hash=hash_request(task_in.model_dump(mode="json")),
+            handler=partial(_create_task_recorded, task_service, task_in),
+        )
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true" if replayed else "false"},
+    )
+
+
+async def _create_task(
+    task_service: TaskService,
+    task_in: TaskCreate,
+    before_commit: Optional[Callable[[Task], None]] = None,
+) -> Task:
+    try:
+        return await task_service.create_task(task_in=task_in, before_commit=before_commit)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
-    return task
+
+
+async def _create_task_recorded(
+    task_service: TaskService,
+    task_in: TaskCreate,
+    record_response: ResponseRecorder,
+):
+    await _create_task(task_service, task_in, before_commit=partial(_record_created_task, record_response))
+
+
+def _record_created_task(record_response: ResponseRecorder, task: Task):
+    record_response(201, TaskOut.model_validate(task, from_attributes=True).model_dump_json())
 
 
 @router.get("/{task_id}", response_model=TaskOut)
 async def get_task_endpoint(
     task_id: int,
+    include_archived: bool = Query(False),
     task_service: TaskService = Depends(get_task_service),
-) -> Optional[Task]:
+) -> Optional[Union[Task, TaskArchive]]:
     """Получает задачу по ID.
 
     Args:
         task_id (int): ID задачи
+        include_archived (bool): Искать также в архиве. Defaults to Query(False).
 
     Raises:
         HTTPException: Задача не найдена (404)
         HTTPException: Доступ запрещён (403)
 
     Returns:
-        Optional[Task]: Полученная задача
+        Optional[Union[Task, TaskArchive]]: Полученная задача
     """
-    task = await task_service.get_task(task_id)
+    task = await task_service.get_task(task_id, include_archived=include_archived)
     if not task:
         raise HTTPException(404, "Задача не найдена")
     if task.owner_id != task_service.user_id:
@@ -76,18 +136,16 @@ async def update_task_endpoint(
         HTTPException: Задача не найдена (404)
         HTTPException: Доступ запрещён (403)
         HTTPException: Неверный формат запроса (422)
+        HTTPException: Задача изменена другим запросом (409)
 
     Returns:
         Optional[Task]: Обновленная задача
     """
-    task = await task_service.get_task(task_id)
-    if not task:
-        raise HTTPException(404, "Задача не найдена")
-    if task.owner_id != task_service.user_id:
-        raise HTTPException(403, "Доступ запрещён")
-
+    task = await _get_own_task(task_service, task_id)
     try:
         updated = await task_service.update_task(task, data)
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     return updated
@@ -106,13 +164,24 @@ async def delete_task_endpoint(
     Raises:
         HTTPException: Задача не найдена (404)
         HTTPException: Доступ запрещён (403)
+        HTTPException: Задача изменена другим запросом (409)
     """
+    task = await _get_own_task(task_service, task_id)
+    try:
+        await task_service.delete_task(task)
+    except TaskNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _get_own_task(task_service: TaskService, task_id: int) -> Task:
     task = await task_service.get_task(task_id)
     if not task:
         raise HTTPException(404, "Задача не найдена")
     if task.owner_id != task_service.user_id:
         raise HTTPException(403, "Доступ запрещён")
-    await task_service.delete_task(task)
+    return task
 
 
 @router.get("/", response_model=List[TaskOut])
@@ -122,31 +191,68 @@ async def list_tasks_endpoint(  # noqa: WPS211
     due_to: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    include_archived: bool = Query(False),
     task_service: TaskService = Depends(get_task_service),
-) -> Sequence[Task]:
+) -> Response:
     """Получает список задач текущего пользователя с возможностью фильтрации.
 
+    Одновременные одинаковые запросы пользователя в воркере выполняются одним
+    запросом к БД и получают один и тот же сериализованный ответ. Статус
+    принимается в любом регистре (`todo` и `TODO` — один запрос), неизвестный
+    статус отклоняется с кодом 422.
+
     Args:
         status (Optional[str]): Статус выполнения. Defaults to Query(None).
         due_from (Optional[str]): Действительна ОТ. Defaults to Query(None).
         due_to (Optional[str]): Действительна ДО. Defaults to Query(None).
         limit (int): Количество записей. Defaults to Query(20, ge=1, le=100).
         offset (int): Номер страницы. Defaults to Query(0, ge=0).
+        include_archived (bool): Добавить задачи из архива. Defaults to Query(False).
 
     Returns:
-        List[Task]: Отфильтрованные задачи пользователя.
+        Response: Отфильтрованные задачи пользователя.
     """
+    task_status = _parse_status(status)
     df = datetime.fromisoformat(due_from) if due_from else None
     dt = datetime.fromisoformat(due_to) if due_to else None
 
+    key = (task_service.user_id, task_status, df, dt, limit, offset, include_archived)
+    body = await list_tasks_flight.do(
+        key,
+        partial(_load_task_list, task_service, task_status, df, dt, limit, offset, include_archived),
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def _parse_status(status: Optional[str]) -> Optional[StatusEnum]:
+    if not status:
+        return None
+    try:
+        return StatusEnum(status.lower())
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Неизвестный статус: {status}")
+
+
+async def _load_task_list(  # noqa: WPS211
+    task_service: TaskService,
+    status: Optional[StatusEnum],
+    due_from: Optional[datetime],
+    due_to: Optional[datetime],
+    limit: int,
+    offset: int,
+    include_archived: bool,
+) -> bytes:
     _, items = await task_service.list_tasks(
         status=status,
-        due_from=df,
-        due_to=dt,
+        due_from=due_from,
+        due_to=due_to,
         limit=limit,
         offset=offset,
+        include_archived=include_archived,
+    )
+    return task_list_adapter.dump_json(
+        task_list_adapter.validate_python(items, from_attributes=True),
     )
-    return items
 
 
 @router.post("/recalculate_overdue")
@@ -160,3 +266,19 @@ async def recalc_overdue(task_service: TaskService = Depends(get_task_service)):
         raise HTTPException(403, "Доступ запрещён")
     updated = await task_service.recalculate_overdue()
     return {"updated": updated}
+
+
+@router.post("/archive_done")
+async def archive_done(task_service: TaskService = Depends(get_task_service)):
+    """Переносит давно выполненные задачи в архив.
+
+    Raises:
+        HTTPException: Доступ запрещён (403)
+    """
+    if task_service.user_id != "admin":
+        raise HTTPException(403, "Доступ запрещён")
+    archived = await task_service.archive_done_tasks(
+        older_than=timedelta(days=TASK_ARCHIVE_AFTER_DAYS),
+        batch_size=TASK_ARCHIVE_BATCH_SIZE,
+    )
+    return {"archived": archived}
@@ -1,4 +1,5 @@
-from typing import Optional
+import enum
+from typing import List, Optional
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field, validator
 from app.models.task import StatusEnum
@@ -56,6 +57,10 @@ class TaskUpdate(BaseModel):
         None,
         description="Новый статус задачи.",
     )
+    version: Optional[int] = Field(
+        None,
+        description="Ожидаемая версия задачи. Если задача уже изменена, вернётся 409.",
+    )
 
     @validator("due_date", pre=True, always=True)
     def ensure_due_date_utc(cls, v):
@@ -81,8 +86,48 @@ class TaskOut(BaseModel):
     is_overdue: bool = Field(description="Просрочена ли задача.")
     created_at: datetime = Field(description="Дата создания задачи.")
     updated_at: datetime = Field(description="Дата последнего обновления задачи.")
+    version: int = Field(description="Версия задачи для оптимистичной блокировки.")
+
+    class Config:
+        """Включает ORM режим для совместимости с моделями SQLAlchemy."""
+
+        orm_mode = True
+
+
+class TaskTombstoneOut(BaseModel):
+    """Схема удалённой задачи в ленте изменений."""
+
+    task_id: int = Field(description="ID удалённой задачи.")
+    reason: str = Field(description="Причина: deleted — задача удалена, archived — перенесена в архив.")
+    deleted_at: datetime = Field(description="Дата удаления задачи.")
 
     class Config:
         """Включает ORM режим для совместимости с моделями SQLAlchemy."""
 
         orm_mode = True
+
+
+class TaskChangesOut(BaseModel):
+    """Схема пачки изменений задач для инкрементальной синхронизации."""
+
+    updated: List[TaskOut] = Field(description="Созданные и изменённые задачи.")
+    deleted: List[TaskTombstoneOut] = Field(description="Удалённые задачи.")
+    next_token: str = Field(description="Токен для запроса следующей пачки изменений.")
+    has_more: bool = Field(description="Есть ли ещё изменения после этой пачки.")
+
+
+class TaskEventType(str, enum.Enum):
+    """Типы событий задач."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ARCHIVED = "archived"
+
+
+class TaskEvent(BaseModel):
+    """Событие изменения задачи для push-канала."""
+
+    type: TaskEventType = Field(description="Тип события.")
+    task_id: int = Field(description="ID задачи.")
+    owner_id: str = Field(description="ID владельца задачи.")
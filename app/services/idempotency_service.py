@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, or_, select, tuple_, update
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+Outcome = Tuple[int, str, bool]
+ResponseRecorder = Callable[[int, str], None]
+InFlight = Tuple[str, asyncio.Future]
+
+_in_flight: Dict[Tuple[str, str], InFlight] = {}
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Ключ уже использован с другим телом запроса."""
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """Запрос с этим ключом ещё выполняется в другом воркере."""
+
+
+def hash_request(payload: Any) -> str:
+    """
+    Считает хэш тела запроса.
+
+    Args:
+        payload (Any): JSON-совместимое тело запроса
+
+    Returns:
+        str: SHA-256 канонического JSON
+    """
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """Асинхронный сервис идемпотентного выполнения запросов."""
+
+    def __init__(self, db: AsyncSession, user_id: str, ttl: timedelta, lock_timeout: timedelta):
+        """
+        Инициализация сервиса.
+
+        Args:
+            db (AsyncSession): Асинхронная сессия БД
+            user_id (str): ID текущего пользователя
+            ttl (timedelta): Сколько хранить ответ
+            lock_timeout (timedelta): Срок блокировки ключа незавершённым запросом
+        """
+        self.db = db
+        self.user_id = user_id
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    async def run(
+        self,
+        key: str,
+        request_hash: str,
+        handler: Callable[[ResponseRecorder], Awaitable[None]],
+    ) -> Outcome:
+        """
+        Выполняет запрос не более одного раза для ключа.
+
+        Повтор с тем же ключом получает сохранённый ответ без вызова handler.
+        Одновременные повторы в этом воркере ждут первый запрос и получают его
+        ответ; если первый запрос завершился ошибкой, повтор выполняется заново.
+        Незавершённый запрос держит ключ не дольше `lock_timeout`: если воркер
+        упал, по истечении блокировки ключ забирает следующий повтор.
+
+        handler получает функцию записи ответа и обязан вызвать её до коммита
+        своей транзакции, чтобы результат и ответ сохранились вместе.
+
+        Ключ, использованный с другим телом, отклоняется с
+        `IdempotencyKeyMismatchError`, ключ незавершённого запроса другого
+        воркера — с `IdempotencyKeyInProgressError`.
+
+        Args:
+            key (str): Значение заголовка Idempotency-Key
+            request_hash (str): Хэш тела запроса
+            handler (Callable[[ResponseRecorder], Awaitable[None]]): Обработчик запроса
+
+        Returns:
+            Outcome: (код ответа, тело ответа, был ли ответ повтором)
+        """
+        flight_key = (self.user_id, key)
+        response = await _wait_in_flight(flight_key, request_hash)
+        if response is not None:
+            return response[0], response[1], True
+
+        leader = asyncio.get_running_loop().create_future()
+        _in_flight[flight_key] = (request_hash, leader)
+        outcome: Optional[Outcome] = None
+        try:  # noqa: WPS501
+            outcome = await self._run_once(key, request_hash, handler)
+        finally:
+            _in_flight.pop(flight_key)
+            leader.set_result(outcome)
+        return outcome
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """
+        Удаляет просроченные ключи пачками.
+
+        Args:
+            batch_size (int): Размер пачки
+
+        Returns:
+            int: Количество удалённых ключей
+        """
+        key_columns = (IdempotencyKey.owner_id, IdempotencyKey.key)
+        is_expired = IdempotencyKey.expires_at < datetime.now(timezone.utc)
+        batch = select(*key_columns).where(is_expired).limit(batch_size)
+        stmt = delete(IdempotencyKey).where(tuple_(*key_columns).in_(batch))
+
+        purged = 0
+        while True:
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            purged += result.rowcount
+            if result.rowcount < batch_size:
+                return purged
+
+    async def _run_once(
+        self,
+        key: str,
+        request_hash: str,
+        handler: Callable[[ResponseRecorder], Awaitable[None]],
+    ) -> Outcome:
+        now = datetime.now(timezone.utc)
+        record = await self._acquire(key, request_hash, now)
+        if record.status_code is not None:
+            return record.status_code, record.response_body, True
+
+        await self._execute(record, handler, now + self.ttl)
+        return record.status_code, record.response_body, False
+
+    async def _acquire(self, key: str, request_hash: str, now: datetime) -> IdempotencyKey:
+        record = await self.db.get(IdempotencyKey, (self.user_id, key))
+
+        if record is not None and record.status_code is not None and record.expires_at <= now:
+            await self.db.delete(record)
+            await self.db.commit()
+            record = None
+
+        if record is None:
+            record = IdempotencyKey(
+                owner_id=self.user_id,
+                key=key,
+                request_hash=request_hash,
+                expires_at=now + self.ttl,
+                locked_until=now + self.lock_timeout,
+            )
+            await _claim(self.db, record)
+            return record
+
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyMismatchError("Idempotency-Key уже использован с другим запросом")
+        if record.status_code is None:
+            await self._take_over(key, now)
+        return record
+
+    async def _execute(
+        self,
+        record: IdempotencyKey,
+        handler: Callable[[ResponseRecorder], Awaitable[None]],
+        expires_at: datetime,
+    ):
+        try:
+            await handler(partial(_record_response, record, expires_at))
+        except asyncio.CancelledError:
+            # Запрос отменён (клиент отключился): ключ освобождается даже при
+            # повторной отмене, иначе он останется заблокированным до lock_timeout.
+            await asyncio.shield(_release(self.db, record))
+            raise
+        except Exception:
+            await _release(self.db, record)
+            raise
+
+        if record.status_code is None:
+            await _release(self.db, record)
+            raise RuntimeError("Обработчик не сохранил ответ на запрос")
+
+    async def _take_over(self, key: str, now: datetime):
+        lock_expired = or_(IdempotencyKey.locked_until.is_(None), IdempotencyKey.locked_until <= now)
+        pending = update(IdempotencyKey).where(
+            IdempotencyKey.owner_id == self.user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            lock_expired,
+        )
+        stmt = pending.values(locked_until=now + self.lock_timeout)
+        result = await self.db.execute(stmt.execution_options(synchronize_session=False))
+        await self.db.commit()
+        if result.rowcount != 1:
+            raise IdempotencyKeyInProgressError("Запрос с этим Idempotency-Key ещё выполняется")
+
+
+async def _wait_in_flight(flight_key: Tuple[str, str], request_hash: str) -> Optional[Outcome]:
+    while flight_key in _in_flight:
+        leader_hash, leader = _in_flight[flight_key]
+        if leader_hash != request_hash:
+            raise IdempotencyKeyMismatchError("Idempotency-Key уже использован с другим запросом")
+        response = await asyncio.shield(leader)
+        if response is not None:
+            return response
+    return None
+
+
+async def _claim(db: AsyncSession, record: IdempotencyKey):
+    db.add(record)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise IdempotencyKeyInProgressError("Запрос с этим Idempotency-Key ещё выполняется")
+
+
+def _record_response(record: IdempotencyKey, expires_at: datetime, status_code: int, body: str):
+    record.status_code = status_code
+    record.response_body = body
+    record.expires_at = expires_at
+    record.locked_until = None
+
+
+async def _release(db: AsyncSession, record: IdempotencyKey):
+    # Откат истекает объект, поэтому ключ читается до него.
+    owner_id, key = record.owner_id, record.key
+    await db.rollback()
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.owner_id == owner_id,
+            IdempotencyKey.key == key,
+        ),
+    )
+    await db.commit()
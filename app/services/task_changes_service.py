@@ -0,0 +1,234 @@
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task
+from app.models.task_tombstone import TaskTombstone
+
+
+CHANGES_SAFETY_LAG = timedelta(seconds=float(os.getenv("CHANGES_SAFETY_LAG_SECONDS", "30")))
+CHANGES_TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("CHANGES_TOMBSTONE_RETENTION_DAYS", "30")))
+
+Cursor = Optional[Tuple[datetime, int]]
+Changes = Tuple[List[Task], List[TaskTombstone], str, bool]
+
+
+class ChangesTokenExpiredError(Exception):
+    """Токен старше срока хранения отметок: клиенту нужна полная синхронизация."""
+
+
+def encode_changes_token(tasks_cursor: Cursor, tombstones_cursor: Cursor) -> str:
+    """
+    Кодирует позиции в ленте изменений в непрозрачный токен.
+
+    Args:
+        tasks_cursor (Cursor): (updated_at, id) последней отданной задачи
+        tombstones_cursor (Cursor): (deleted_at, id) последнего отданного удаления
+
+    Returns:
+        str: Токен продолжения
+    """
+    payload = {"t": _encode_cursor(tasks_cursor), "d": _encode_cursor(tombstones_cursor)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_changes_token(token: Optional[str]) -> Tuple[Cursor, Cursor]:
+    """
+    Декодирует токен ленты изменений.
+
+    Args:
+        token (Optional[str]): Токен продолжения или None для синхронизации с начала
+
+    Raises:
+        ValueError: Если токен повреждён
+
+    Returns:
+        Tuple[Cursor, Cursor]: (позиция в задачах, позиция в удалениях)
+    """
+    if not token:
+        return None, None
+    try:
+        return _parse_token(token)
+    except (TypeError, KeyError, IndexError, ValueError):
+        raise ValueError("Некорректный токен синхронизации")
+
+
+class TaskChangesService:
+    """Асинхронный сервис ленты изменений задач для инкрементальной синхронизации."""
+
+    def __init__(self, db: AsyncSession, user_id: str):
+        """
+        Инициализация сервиса.
+
+        Args:
+            db (AsyncSession): Асинхронная сессия БД
+            user_id (str): ID текущего пользователя
+        """
+        self.db = db
+        self.user_id = user_id
+
+    async def list_changes(self, since: Optional[str] = None, limit: int = 100) -> Changes:
+        """
+        Возвращает пачку изменений задач пользователя после токена.
+
+        Задачи и удаления читаются по индексам (owner_id, updated_at, id) и
+        (owner_id, deleted_at, id), поэтому стоимость запроса зависит от
+        количества изменений, а не от общего числа задач.
+
+        `updated_at` и `deleted_at` — время начала транзакции, а не коммита,
+        поэтому изменение может стать видимым с меткой меньше уже выданного
+        курсора. Лента отдаёт только изменения старше `now() - CHANGES_SAFETY_LAG`:
+        пока пишущие транзакции короче этого окна, курсор не обгоняет
+        незакоммиченные изменения. По той же причине первая синхронизация
+        начинает отметки с горизонта: задач, удалённых раньше, в снимке уже нет.
+
+        Args:
+            since (Optional[str]): Токен из предыдущего ответа или None
+            limit (int): Максимальный размер пачки
+
+        Raises:
+            ChangesTokenExpiredError: Отметки после токена уже удалены по сроку хранения
+
+        Returns:
+            Changes: (изменённые задачи, удаления, новый токен, есть ли ещё изменения)
+        """
+        tasks_cursor, tombstones_cursor = decode_changes_token(since)
+        now = await self.db.scalar(select(func.now()))
+        if since and _is_expired(tombstones_cursor, now):
+            raise ChangesTokenExpiredError("Токен синхронизации устарел, выполните полную синхронизацию")
+
+        horizon = now - CHANGES_SAFETY_LAG
+        if not since:
+            tombstones_cursor = (horizon, 0)
+
+        tasks = await self._changed_tasks(tasks_cursor, horizon, limit + 1)
+        tombstones = await self._changed_tombstones(tombstones_cursor, horizon, limit + 1)
+        updated, deleted = _merge_changes(tasks, tombstones, limit)
+
+        if updated:
+            tasks_cursor = (updated[-1].updated_at, updated[-1].id)
+        token = encode_changes_token(
+            tasks_cursor,
+            _next_tombstones_cursor(tombstones_cursor, deleted, len(tombstones), horizon),
+        )
+        merged = len(updated) + len(deleted)
+        has_more = len(tasks) + len(tombstones) > merged
+
+        return updated, deleted, token, has_more
+
+    async def purge_tombstones(self, batch_size: int = 1000) -> int:
+        """
+        Удаляет отметки старше `CHANGES_TOMBSTONE_RETENTION` пачками.
+
+        Args:
+            batch_size (int): Размер пачки
+
+        Returns:
+            int: Количество удалённых отметок
+        """
+        cutoff = func.now() - CHANGES_TOMBSTONE_RETENTION
+        expired = select(TaskTombstone.id).where(TaskTombstone.deleted_at < cutoff)
+        batch = expired.limit(batch_size)
+        stmt = delete(TaskTombstone).where(TaskTombstone.id.in_(batch))
+
+        purged = 0
+        while True:
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            purged += result.rowcount
+            if result.rowcount < batch_size:
+                return purged
+
+    async def _changed_tasks(self, cursor: Cursor, horizon: datetime, limit: int) -> List[Task]:
+        position = tuple_(Task.updated_at, Task.id)
+        tasks_q = select(Task).where(
+            Task.owner_id == self.user_id,
+            Task.updated_at < horizon,
+        )
+        if cursor:
+            tasks_q = tasks_q.where(position > tuple_(*cursor))
+        ordered_q = tasks_q.order_by(Task.updated_at, Task.id).limit(limit)
+        result = await self.db.execute(ordered_q)
+        return list(result.scalars().all())
+
+    async def _changed_tombstones(self, cursor: Cursor, horizon: datetime, limit: int) -> List[TaskTombstone]:
+        position = tuple_(TaskTombstone.deleted_at, TaskTombstone.id)
+        tombstones_q = select(TaskTombstone).where(
+            TaskTombstone.owner_id == self.user_id,
+            TaskTombstone.deleted_at < horizon,
+            position > tuple_(*cursor),
+        )
+        ordered_q = tombstones_q.order_by(TaskTombstone.deleted_at, TaskTombstone.id).limit(limit)
+        result = await self.db.execute(ordered_q)
+        return list(result.scalars().all())
+
+
+def _encode_cursor(cursor: Cursor) -> Optional[list]:
+    if cursor is None:
+        return None
+    return [cursor[0].isoformat(), cursor[1]]
+
+
+def _decode_cursor(value: Optional[list]) -> Cursor:
+    if not value:
+        return None
+    return datetime.fromisoformat(value[0]), int(value[1])
+
+
+def _parse_token(token: str) -> Tuple[Cursor, Cursor]:
+    payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return _decode_cursor(payload["t"]), _decode_cursor(payload["d"])
+
+
+def _is_expired(tombstones_cursor: Cursor, now: datetime) -> bool:
+    # Токены без позиции в отметках выданы до ограничения срока хранения.
+    return tombstones_cursor is None or tombstones_cursor[0] < now - CHANGES_TOMBSTONE_RETENTION
+
+
+def _merge_changes(
+    tasks: Sequence[Task],
+    tombstones: Sequence[TaskTombstone],
+    limit: int,
+) -> Tuple[List[Task], List[TaskTombstone]]:
+    updated: List[Task] = []
+    deleted: List[TaskTombstone] = []
+    for _ in range(min(limit, len(tasks) + len(tombstones))):
+        if _task_goes_first(tasks, tombstones, len(updated), len(deleted)):
+            updated.append(tasks[len(updated)])
+        else:
+            deleted.append(tombstones[len(deleted)])
+    return updated, deleted
+
+
+def _task_goes_first(
+    tasks: Sequence[Task],
+    tombstones: Sequence[TaskTombstone],
+    task_index: int,
+    tombstone_index: int,
+) -> bool:
+    if task_index == len(tasks):
+        return False
+    if tombstone_index == len(tombstones):
+        return True
+    return tasks[task_index].updated_at <= tombstones[tombstone_index].deleted_at
+
+
+def _next_tombstones_cursor(
+    cursor: Cursor,
+    deleted: List[TaskTombstone],
+    fetched: int,
+    horizon: datetime,
+) -> Cursor:
+    if len(deleted) == fetched:
+        # Все отметки до горизонта выданы: курсор сдвигается к нему, чтобы не устареть
+        # у владельца без удалений.
+        return max(cursor, (horizon, 0))
+    if deleted:
+        return deleted[-1].deleted_at, deleted[-1].id
+    return cursor
@@ -1,14 +1,30 @@
-from typing import Optional, Tuple, Sequence
-from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Tuple, Sequence, Type, Union
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, case, delete, func, insert, literal, select, update
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.models.task import Task, StatusEnum
-from app.schemas import TaskCreate, TaskUpdate
+from app.events import dispatch_task_events, notify_task_events
+from app.models.task import Task, TaskArchive, StatusEnum
+from app.models.task_tombstone import TaskTombstone
+from app.schemas import TaskCreate, TaskEventType, TaskUpdate
 
+TaskModel = Type[Union[Task, TaskArchive]]
+# Задачи без архива — ORM-объекты, с архивом — строки объединённого запроса.
+TaskPage = Tuple[int, Sequence[Any]]
 
-class TaskService:
+
+class TaskConflictError(Exception):
+    """Задача была изменена другим запросом."""
+
+
+class TaskNotFoundError(Exception):
+    """Задача уже удалена или перенесена в архив другим запросом."""
+
+
+class TaskService:  # noqa: WPS214
     """Асинхронный сервис для управления задачами."""
 
     def __init__(self, db: AsyncSession, user_id: str):
@@ -22,12 +38,18 @@ class TaskService:
         self.db = db
         self.user_id = user_id
 
-    async def create_task(self, task_in: TaskCreate) -> Task:
+    async def create_task(
+        self,
+        task_in: TaskCreate,
+        before_commit: Optional[Callable[[Task], None]] = None,
+    ) -> Task:
         """
         Создаёт новую задачу.
 
         Args:
             task_in (TaskCreate): Данные создаваемой задачи
+            before_commit (Optional[Callable[[Task], None]]): Вызывается с сохранённой
+                задачей до коммита, чтобы записать связанные данные в ту же транзакцию
 
         Raises:
             ValueError: Если статус DONE без due_date
@@ -47,50 +69,76 @@ class TaskService:
         )
 
         self.db.add(task)
-        await self.db.commit()
+        await self.db.flush()
         await self.db.refresh(task)
+        await notify_task_events(self.db, TaskEventType.CREATED, [task])
+        if before_commit is not None:
+            before_commit(task)
+        await self.db.commit()
+        dispatch_task_events(TaskEventType.CREATED, [task])
 
         return task
 
-    async def get_task(self, task_id: int) -> Optional[Task]:
+    async def get_task(
+        self,
+        task_id: int,
+        include_archived: bool = False,
+    ) -> Optional[Union[Task, TaskArchive]]:
         """
         Получает задачу по ID.
 
         Args:
             task_id (int): ID задачи
+            include_archived (bool): Искать также в архиве
 
         Returns:
-            Optional[Task]: Найденная задача или None
+            Optional[Union[Task, TaskArchive]]: Найденная задача или None
         """
         result = await self.db.execute(
             select(Task).where(Task.id == task_id),
         )
+        task = result.scalar_one_or_none()
+        if task is not None or not include_archived:
+            return task
+
+        result = await self.db.execute(
+            select(TaskArchive).where(TaskArchive.id == task_id),
+        )
         return result.scalar_one_or_none()
 
     async def update_task(self, task: Task, data: TaskUpdate) -> Task:
         """
         Обновляет существующую задачу.
 
+        UPDATE выполняется с условием на версию (`version_id_col`), поэтому
+        конкурентные изменения обнаруживаются без `SELECT ... FOR UPDATE`.
+
         Args:
             task (Task): Объект задачи
             data (TaskUpdate): Новые данные
 
         Raises:
             ValueError: Если статус DONE без due_date
+            TaskConflictError: Если версия задачи не совпадает с ожидаемой
 
         Returns:
             Task: Обновлённая задача
         """
+        if data.version is not None and data.version != task.version:
+            raise TaskConflictError("Задача была изменена, обновите данные")
+
         if data.status == StatusEnum.DONE:
             due = data.due_date if data.due_date is not None else task.due_date
             if not due:
                 raise ValueError("Статус 'done' требует указания due_date")
 
-        for field, value in data.model_dump(exclude_unset=True).items():
+        for field, value in data.model_dump(exclude_unset=True, exclude={"version"}).items():
             setattr(task, field, value)
 
-        await self.db.commit()
+        await notify_task_events(self.db, TaskEventType.UPDATED, [task])
+        await _commit_versioned(self.db)
         await self.db.refresh(task)
+        dispatch_task_events(TaskEventType.UPDATED, [task])
 
         return task
 
@@ -98,11 +146,29 @@ class TaskService:
         """
         Удаляет задачу.
 
+        DELETE, как и UPDATE, выполняется с условием на версию: если задачу
+        успели изменить, удаление откатывается с конфликтом.
+
         Args:
             task (Task): Задача для удаления
+
+        Raises:
+            TaskNotFoundError: Если задачу уже удалили или перенесли в архив
+            TaskConflictError: Если задачу изменили после чтения
         """
+        task_id = task.id
+        self.db.add(TaskTombstone(task_id=task_id, owner_id=task.owner_id))
         await self.db.delete(task)
-        await self.db.commit()
+        await notify_task_events(self.db, TaskEventType.DELETED, [task])
+        try:
+            await _commit_versioned(self.db)
+        except TaskConflictError:
+            remaining_q = select(Task.id).where(Task.id == task_id)
+            remaining = await self.db.scalar(remaining_q)
+            if remaining is None:
+                raise TaskNotFoundError("Задача не найдена")
+            raise
+        dispatch_task_events(TaskEventType.DELETED, [task])
 
     async def list_tasks(  # noqa: WPS211
         self,
@@ -111,74 +177,168 @@ class TaskService:
         due_to: Optional[datetime] = None,
         limit: int = 20,
         offset: int = 0,
-    ) -> Tuple[int, Sequence[Task]]:
+        include_archived: bool = False,
+    ) -> TaskPage:
         """
         Возвращает список задач с фильтрами и пагинацией.
 
+        С архивом задачи и архивные записи объединяются одним `UNION ALL`,
+        а сортировка и пагинация выполняются в БД.
+
         Args:
             status (Optional[StatusEnum]): Фильтр по статусу
             due_from (Optional[datetime]): Дата ОТ
             due_to (Optional[datetime]): Дата ДО
             limit (int): Количество записей
             offset (int): Смещение
+            include_archived (bool): Добавить задачи из архива
 
         Returns:
-            Tuple[int, List[Task]]: (общее количество, список задач)
+            TaskPage: (общее количество, список задач)
         """
-        q = select(Task).where(Task.owner_id == self.user_id)
-
-        if status:
-            q = q.where(Task.status == status)
-        if due_from:
-            q = q.where(Task.due_date >= due_from)
-        if due_to:
-            q = q.where(Task.due_date <= due_to)
-
-        total_result = await self.db.execute(q)
-        total = len(total_result.scalars().all())
-
-        items_result = await self.db.execute(
-            q.order_by(Task.created_at.desc()).offset(offset).limit(limit),
+        filters = (status, due_from, due_to)
+        if include_archived:
+            active = _listed_tasks(Task, self.user_id, *filters)
+            archived = _listed_tasks(TaskArchive, self.user_id, *filters)
+            listed = active.union_all(archived).subquery()
+            q = select(listed)
+            created_at = listed.c.created_at
+        else:
+            conditions = _task_filters(Task, self.user_id, *filters)
+            q = select(Task).where(*conditions)
+            created_at = Task.created_at
+
+        total_result = await self.db.execute(
+            select(func.count()).select_from(q.subquery()),
         )
-        items = items_result.scalars().all()
+        total = total_result.scalar_one()
 
-        return total, items
+        page_q = q.order_by(created_at.desc()).offset(offset).limit(limit)
+        items_result = await self.db.execute(page_q)
+        if include_archived:
+            return total, items_result.all()
+        return total, items_result.scalars().all()
 
     async def recalculate_overdue(self) -> int:
         """
         Пересчитывает просроченные задачи.
 
+        Пересчёт — один UPDATE по всем невыполненным задачам, у которых флаг
+        просрочки разошёлся с due_date. Он увеличивает `version`, поэтому
+        клиенты, прочитавшие задачу раньше, получат конфликт, а сам пересчёт
+        не конфликтует с параллельными изменениями.
+
         Returns:
             int: Количество обновленных задач
         """
-        now = datetime.now(timezone.utc)
-
-        result = await self.db.execute(
-            select(Task).where(Task.status != StatusEnum.DONE),
+        has_due_date = Task.due_date.is_not(None)
+        is_over = and_(has_due_date, Task.due_date < func.now())
+        overdue = literal(StatusEnum.OVERDUE, Task.status.type)
+
+        not_done = Task.status != StatusEnum.DONE
+        stale = update(Task).where(not_done, Task.is_overdue != is_over)
+        recalculated = stale.values(
+            is_overdue=is_over,
+            status=case((is_over, overdue), else_=Task.status),
+            version=Task.version + 1,
         )
-        tasks = result.scalars().all()
+        stmt = recalculated.returning(Task.id, Task.owner_id)
+        result = await self.db.execute(stmt.execution_options(synchronize_session=False))
+        changed = result.all()
 
-        updated = 0
+        await notify_task_events(self.db, TaskEventType.UPDATED, changed)
+        await self.db.commit()
+        dispatch_task_events(TaskEventType.UPDATED, changed)
 
-        for task in tasks:
-            is_over = False
-            if task.due_date is not None:
-                if task.due_date.tzinfo is None:
-                    due_date_utc = task.due_date.replace(tzinfo=timezone.utc)
-                else:
-                    due_date_utc = task.due_date
-                is_over = due_date_utc < now
+        return len(changed)
 
-            if task.is_overdue != is_over:
-                task.is_overdue = is_over
+    async def archive_done_tasks(self, older_than: timedelta, batch_size: int = 1000) -> int:
+        """
+        Переносит выполненные задачи в архив пачками.
 
-                if is_over:
-                    task.status = StatusEnum.OVERDUE
+        Каждая пачка — один запрос `DELETE ... RETURNING`, вставляющий удалённые
+        строки в `tasks_archive` и отметки с причиной `archived` в ленту изменений,
+        и отдельная транзакция. Кандидаты выбираются по частичному индексу
+        выполненных задач; заблокированные строки пропускаются.
 
-                updated += 1
-                self.db.add(task)
+        Args:
+            older_than (timedelta): Сколько задача должна пробыть выполненной
+            batch_size (int): Размер пачки
 
-        if updated:
-            await self.db.commit()
+        Returns:
+            int: Количество перенесённых задач
+        """
+        cutoff = datetime.now(timezone.utc) - older_than
+        columns = [column.name for column in TaskArchive.__table__.columns if column.name != "archived_at"]
+
+        task_table = Task.__table__
+        archive_table = TaskArchive.__table__
+        tombstone_table = TaskTombstone.__table__
+
+        is_done = Task.status == StatusEnum.DONE
+        done = select(Task.id).where(is_done, Task.updated_at < cutoff)
+        oldest = done.order_by(Task.updated_at).limit(batch_size)
+        candidates = oldest.with_for_update(skip_locked=True).scalar_subquery()
+
+        deleted = delete(task_table).where(task_table.c.id.in_(candidates))
+        deleted_columns = [task_table.c[name] for name in columns]
+        moved = deleted.returning(*deleted_columns).cte("moved")
 
-        return updated
+        moved_rows = select(*(moved.c[name] for name in columns))
+        copied = insert(archive_table).from_select(columns, moved_rows)
+        archived_rows = copied.returning(archive_table.c.id, archive_table.c.owner_id).cte("archived")
+
+        marked = insert(tombstone_table).from_select(
+            ["task_id", "owner_id", "reason"],
+            select(archived_rows.c.id, archived_rows.c.owner_id, literal("archived")),
+        )
+        stmt = marked.returning(tombstone_table.c.task_id.label("id"), tombstone_table.c.owner_id)
+
+        archived = 0
+        while True:
+            result = await self.db.execute(stmt)
+            moved_tasks = result.all()
+            await notify_task_events(self.db, TaskEventType.ARCHIVED, moved_tasks)
+            await self.db.commit()
+            dispatch_task_events(TaskEventType.ARCHIVED, moved_tasks)
+            archived += len(moved_tasks)
+            if len(moved_tasks) < batch_size:
+                return archived
+
+
+def _task_filters(
+    model: TaskModel,
+    owner_id: str,
+    status: Optional[StatusEnum],
+    due_from: Optional[datetime],
+    due_to: Optional[datetime],
+) -> List[ColumnElement]:
+    conditions = [model.owner_id == owner_id]
+    if status:
+        conditions.append(model.status == status)
+    if due_from:
+        conditions.append(model.due_date >= due_from)
+    if due_to:
+        conditions.append(model.due_date <= due_to)
+    return conditions
+
+
+def _listed_tasks(
+    model: TaskModel,
+    owner_id: str,
+    status: Optional[StatusEnum],
+    due_from: Optional[datetime],
+    due_to: Optional[datetime],
+) -> Select:
+    # Одинаковый набор колонок для задач и архива, чтобы их можно было объединить.
+    columns = [model.__table__.c[column.name] for column in Task.__table__.columns]
+    conditions = _task_filters(model, owner_id, status, due_from, due_to)
+    return select(*columns).where(*conditions)
+
+
+async def _commit_versioned(db: AsyncSession):
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise TaskConflictError("Задача была изменена, обновите данные")
@@ -0,0 +1,88 @@
+"""Бенчмарк активной выборки до и после архивации выполненных задач.
+
+Требует PostgreSQL из DATABASE_URL. Заполняет `tasks` синтетическими данными
+(по умолчанию 10M строк, 80% выполнены и старше порога архивации), замеряет
+`list_tasks` по случайным владельцам, переносит выполненные задачи в архив и
+повторяет замер.
+
+Запуск:
+    python -m benchmarks.bench_archive --rows 10000000 --owners 10000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.db import AsyncSessionLocal, Base, engine
+from app.services.task_service import TaskService
+
+SEED_SQL = """
+INSERT INTO tasks (owner_id, title, status, is_overdue, version, created_at, updated_at)
+SELECT
+    'owner' || (g % :owners),
+    'task ' || g,
+    CAST(CASE WHEN g % 10 < 8 THEN 'DONE' ELSE 'TODO' END AS statusenum),
+    false,
+    1,
+    now() - (g % 365 + 60) * interval '1 day',
+    now() - (g % 365 + 60) * interval '1 day'
+FROM generate_series(1, :rows) AS g
+"""
+
+
+async def vacuum():
+    """Обновляет статистику и карту видимости после массовых изменений."""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE tasks"))
+        await conn.execute(text("VACUUM ANALYZE tasks_archive"))
+
+
+async def measure(owners: int, samples: int) -> str:
+    """Замеряет задержку list_tasks по случайным владельцам."""
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(samples):
+            service = TaskService(db, f"owner{random.randrange(owners)}")
+            started = time.perf_counter()
+            await service.list_tasks(limit=20)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return f"p50 {p50:.1f} ms, p99 {p99:.1f} ms"
+
+
+async def main(rows: int, owners: int, samples: int, batch_size: int):
+    """Заполняет таблицу, замеряет, архивирует и замеряет снова."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("TRUNCATE tasks, tasks_archive"))
+        await conn.execute(text(SEED_SQL), {"rows": rows, "owners": owners})
+    await vacuum()
+
+    print(f"rows: {rows}, owners: {owners}")
+    print(f"before archival: {await measure(owners, samples)}")
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        archived = await TaskService(db, "admin").archive_done_tasks(timedelta(days=30), batch_size)
+    print(f"archived {archived} tasks in {time.perf_counter() - started:.1f} s")
+    await vacuum()
+
+    print(f"after archival:  {await measure(owners, samples)}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--owners", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.owners, args.samples, args.batch_size))
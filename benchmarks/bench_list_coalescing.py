@@ -0,0 +1,96 @@
+"""Нагрузочный тест объединения одинаковых запросов списка задач.
+
+Запросы идут через роутер FastAPI в процессе (нужен httpx); вместо БД —
+TaskService с фиксированной задержкой запроса, который считает выполнения.
+Моделируется «начало часа»: каждый пользователь открыл несколько вкладок,
+и все они одновременно запрашивают один и тот же список.
+
+Запуск:
+    python -m benchmarks.bench_list_coalescing --users 200 --tabs 10 --rounds 5 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import Header
+
+from app.coalescing import list_tasks_flight
+from app.dependencies import get_task_service
+from app.main import app
+from app.models.task import StatusEnum, Task
+
+
+class FakeTaskService:
+    """TaskService с задержкой вместо запросов к БД."""
+
+    queries = 0
+
+    def __init__(self, user_id: str, latency: float):
+        """Запоминает пользователя и задержку запроса."""
+        self.user_id = user_id
+        self.latency = latency
+
+    async def list_tasks(self, **filters):
+        """Имитирует два запроса list_tasks."""
+        FakeTaskService.queries += 2
+        await asyncio.sleep(self.latency)
+        now = datetime.now(timezone.utc)
+        items = [
+            Task(
+                id=i,
+                owner_id=self.user_id,
+                title=f"task {i}",
+                status=StatusEnum.TODO,
+                is_overdue=False,
+                version=1,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(filters["limit"])
+        ]
+        return len(items), items
+
+
+async def main(users: int, tabs: int, rounds: int, latency: float, ttl: float):
+    """Отправляет одновременные одинаковые запросы и печатает число запросов к БД."""
+    list_tasks_flight.ttl = ttl
+
+    def override(x_user_id: str = Header(...)) -> FakeTaskService:
+        """Подменяет TaskService фиктивным."""
+        return FakeTaskService(x_user_id, latency)
+
+    app.dependency_overrides[get_task_service] = override
+    transport = httpx.ASGITransport(app=app)
+    requests = 0
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            responses = await asyncio.gather(*(
+                client.get("/tasks/?status=todo&limit=20", headers={"X-User-Id": f"user{user}"})
+                for user in range(users)
+                for _ in range(tabs)
+            ))
+            assert all(response.status_code == 200 for response in responses)
+            requests += len(responses)
+            await asyncio.sleep(latency * 2)
+    elapsed = time.perf_counter() - started
+
+    stats = list_tasks_flight.stats()
+    print(f"requests:             {requests} ({requests / elapsed:,.0f}/s)")
+    print(f"db queries without:   {requests * 2}")
+    print(f"db queries with:      {FakeTaskService.queries}")
+    print(f"reduction:            {requests * 2 / max(FakeTaskService.queries, 1):.1f}x")
+    print(f"coalesced / cached:   {stats['coalesced']} / {stats['cache_hits']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tabs", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--db-latency-ms", type=float, default=5)
+    parser.add_argument("--cache-ttl-ms", type=float, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.tabs, args.rounds, args.db_latency_ms / 1000, args.cache_ttl_ms / 1000))
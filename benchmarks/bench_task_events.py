@@ -0,0 +1,66 @@
+"""Бенчмарк push-канала: сколько подписок держит воркер и сколько событий в секунду он рассылает.
+
+Запуск:
+    python -m benchmarks.bench_task_events --connections 10000 --owners 2000 --events 50000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.events import TaskEventBroker, stream_task_events
+from app.schemas import TaskEvent, TaskEventType
+
+
+async def consume(stream, counter):
+    """Читает поток SSE и считает доставленные события."""
+    async for chunk in stream:
+        counter[0] += chunk.count("event: task")
+
+
+async def main(connections: int, owners: int, events: int, queue_size: int):
+    """Поднимает подписки, публикует события и печатает результаты."""
+    import app.events as events_module
+
+    broker = TaskEventBroker(queue_size=queue_size)
+    events_module.broker = broker
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    counter = [0]
+    consumers = []
+    for i in range(connections):
+        stream = stream_task_events(f"user{i % owners}")
+        consumers.append(asyncio.create_task(consume(stream, counter)))
+    await asyncio.sleep(0)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for i in range(events):
+        broker.publish(TaskEvent(type=TaskEventType.UPDATED, task_id=i, owner_id=f"user{i % owners}"))
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    while counter[0] + broker.dropped < broker.delivered:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+
+    print(f"connections held:      {connections}")
+    print(f"memory per connection: {(after - before) / connections / 1024:.1f} KiB")
+    print(f"events published:      {events} ({events / elapsed:,.0f}/s)")
+    print(f"messages delivered:    {counter[0]} ({counter[0] / elapsed:,.0f}/s)")
+    print(f"messages dropped:      {broker.dropped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--owners", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--queue-size", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.owners, args.events, args.queue_size))
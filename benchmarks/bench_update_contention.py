@@ -0,0 +1,90 @@
+"""Бенчмарк конкурентных обновлений одной задачи: версия против SELECT ... FOR UPDATE.
+
+Требует PostgreSQL из DATABASE_URL. Каждый клиент читает задачу, обновляет её
+с ожидаемой версией и при 409 повторяет попытку; в режиме `lock` строка
+блокируется на время транзакции.
+
+Запуск:
+    python -m benchmarks.bench_update_contention --clients 50 --updates 20 --mode optimistic
+    python -m benchmarks.bench_update_contention --clients 50 --updates 20 --mode lock
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+
+from app.db import AsyncSessionLocal, Base, engine
+from app.models.task import Task
+from app.schemas import TaskCreate, TaskUpdate
+from app.services.task_service import TaskConflictError, TaskService
+
+OWNER_ID = "bench-contention"
+
+
+async def optimistic_update(task_id: int, title: str) -> int:
+    """Обновляет задачу с проверкой версии, возвращает число конфликтов."""
+    conflicts = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            service = TaskService(db, OWNER_ID)
+            task = await service.get_task(task_id)
+            try:
+                await service.update_task(task, TaskUpdate(title=title, version=task.version))
+            except TaskConflictError:
+                conflicts += 1
+                continue
+            return conflicts
+
+
+async def locking_update(task_id: int, title: str) -> int:
+    """Обновляет задачу под блокировкой строки."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Task).where(Task.id == task_id).with_for_update())
+        task = result.scalar_one()
+        task.title = title
+        await db.commit()
+    return 0
+
+
+async def client(mode: str, task_id: int, client_id: int, updates: int, latencies, conflicts):
+    """Последовательно выполняет обновления одного клиента."""
+    update = optimistic_update if mode == "optimistic" else locking_update
+    for i in range(updates):
+        started = time.perf_counter()
+        conflicts.append(await update(task_id, f"client {client_id} update {i}"))
+        latencies.append(time.perf_counter() - started)
+
+
+async def main(mode: str, clients: int, updates: int):
+    """Создаёт задачу, запускает клиентов и печатает перцентили задержки."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        task = await TaskService(db, OWNER_ID).create_task(TaskCreate(title="contention"))
+
+    latencies, conflicts = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(mode, task.id, client_id, updates, latencies, conflicts)
+        for client_id in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"mode:        {mode}")
+    print(f"updates:     {len(latencies)} ({len(latencies) / elapsed:,.0f}/s)")
+    print(f"conflicts:   {sum(conflicts)}")
+    print(f"p50 latency: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"p99 latency: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["optimistic", "lock"], default="optimistic")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.mode, args.clients, args.updates))
@@ -0,0 +1,25 @@
+import asyncio
+
+from alembic import context
+
+from app.db import Base, engine
+from app.models import idempotency_key, task, task_tombstone  # noqa: F401
+
+target_metadata = Base.metadata
+
+
+def do_run_migrations(connection):
+    """Запускает миграции на синхронном соединении."""
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    """Запускает миграции через асинхронный engine приложения."""
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+asyncio.run(run_migrations_online())
@@ -0,0 +1,44 @@
+"""Версия задачи и индексы ленты изменений и архивации.
+
+Таблицы создаёт `Base.metadata.create_all` при старте, но он не меняет
+существующую таблицу `tasks`. Миграция добавляет в неё колонку `version`
+и индексы, появившиеся позже; на новой базе, где `create_all` уже создал
+их, она ничего не меняет.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Добавляет `tasks.version` и индексы без блокировки записи в таблицу."""
+    if not sa.inspect(op.get_bind()).has_table("tasks"):
+        return
+
+    op.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_owner_updated "
+            "ON tasks (owner_id, updated_at, id)",
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_done_updated "
+            "ON tasks (updated_at) WHERE status = 'DONE'",
+        )
+
+
+def downgrade():
+    """Удаляет индексы и колонку `tasks.version`."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_done_updated")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_owner_updated")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS version")
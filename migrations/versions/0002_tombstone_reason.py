@@ -0,0 +1,29 @@
+"""Причина отметки в ленте изменений: удаление или архивация.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Добавляет `task_tombstones.reason`; существующие отметки — удаления."""
+    if not sa.inspect(op.get_bind()).has_table("task_tombstones"):
+        return
+
+    op.execute(
+        "ALTER TABLE task_tombstones ADD COLUMN IF NOT EXISTS reason VARCHAR NOT NULL DEFAULT 'deleted'",
+    )
+
+
+def downgrade():
+    """Удаляет `task_tombstones.reason`."""
+    op.execute("ALTER TABLE task_tombstones DROP COLUMN IF EXISTS reason")
@@ -0,0 +1,29 @@
+"""Срок блокировки ключа идемпотентности незавершённым запросом.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Добавляет `idempotency_keys.locked_until`."""
+    if not sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        return
+
+    op.execute(
+        "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP WITH TIME ZONE",
+    )
+
+
+def downgrade():
+    """Удаляет `idempotency_keys.locked_until`."""
+    op.execute("ALTER TABLE idempotency_keys DROP COLUMN IF EXISTS locked_until")
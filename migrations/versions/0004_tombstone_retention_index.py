@@ -0,0 +1,32 @@
+"""Индекс для удаления отметок ленты изменений по сроку хранения.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Добавляет индекс `task_tombstones (deleted_at)` без блокировки записи в таблицу."""
+    if not sa.inspect(op.get_bind()).has_table("task_tombstones"):
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_tombstones_deleted_at "
+            "ON task_tombstones (deleted_at)",
+        )
+
+
+def downgrade():
+    """Удаляет индекс `task_tombstones (deleted_at)`."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_task_tombstones_deleted_at")
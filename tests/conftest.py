@@ -1,7 +1,9 @@
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 from datetime import datetime, timedelta, timezone
 
+from app.services.idempotency_service import IdempotencyService
+from app.services.task_changes_service import TaskChangesService
 from app.services.task_service import TaskService
 from app.models.task import Task, StatusEnum
 from app.schemas import TaskCreate, TaskUpdate
@@ -18,12 +20,43 @@ def mock_db():
     return db
 
 
+@pytest.fixture(autouse=True)
+def notified_events(monkeypatch):
+    """Подменяем NOTIFY событий задач, чтобы перехватывать их в тестах."""
+    notify = AsyncMock()
+    monkeypatch.setattr("app.services.task_service.notify_task_events", notify)
+    return notify
+
+
+@pytest.fixture(autouse=True)
+def dispatched_events(monkeypatch):
+    """Подменяем доставку событий задач в брокер, чтобы перехватывать их в тестах."""
+    dispatch = Mock()
+    monkeypatch.setattr("app.services.task_service.dispatch_task_events", dispatch)
+    return dispatch
+
+
 @pytest.fixture
 def task_service(mock_db):  # noqa: WPS442
     """Создаём TaskService с мок-сессией и фиктивным пользователем."""
     return TaskService(db=mock_db, user_id="user1")
 
 
+@pytest.fixture
+def changes_service(mock_db):  # noqa: WPS442
+    """Создаём TaskChangesService с мок-сессией и фиктивным пользователем."""
+    return TaskChangesService(db=mock_db, user_id="user1")
+
+
+@pytest.fixture
+def idempotency_service(mock_db):  # noqa: WPS442
+    """Создаём IdempotencyService с мок-сессией и фиктивным пользователем."""
+    mock_db.add = Mock()
+    mock_db.get = AsyncMock(return_value=None)
+    mock_db.rollback = AsyncMock()
+    return IdempotencyService(db=mock_db, user_id="user1", ttl=timedelta(hours=1), lock_timeout=timedelta(seconds=35))
+
+
 @pytest.fixture
 def sample_task():
     """Возвращает пример задачи."""
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+
+from app.coalescing import SingleFlight
+
+
+def slow_loader(result, calls, delay=0.01):
+    """Возвращает загрузчик, считающий свои вызовы."""
+    async def load():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+    return load
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    """Тест: одновременные вызовы с одним ключом выполняются один раз."""
+    flight = SingleFlight()
+    calls = []
+
+    results = await asyncio.gather(*(
+        flight.do(("user1", "todo"), slow_loader(b"[]", calls)) for _ in range(10)
+    ))
+
+    assert calls == [b"[]"]
+    assert results == [b"[]"] * 10
+    assert flight.stats()["executed"] == 1
+    assert flight.stats()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_different_keys_execute_separately():
+    """Тест: разные фильтры не объединяются."""
+    flight = SingleFlight()
+    calls = []
+
+    await asyncio.gather(
+        flight.do(("user1", "todo"), slow_loader(b"a", calls)),
+        flight.do(("user1", "done"), slow_loader(b"b", calls)),
+    )
+
+    assert sorted(calls) == [b"a", b"b"]
+
+
+@pytest.mark.asyncio
+async def test_failed_leader_lets_followers_retry():
+    """Тест: после ошибки первого вызова ожидающие выполняют запрос сами."""
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    leader = asyncio.ensure_future(flight.do(("user1",), failing))
+    await asyncio.sleep(0)
+    follower = await flight.do(("user1",), slow_loader(b"ok", calls))
+
+    with pytest.raises(RuntimeError):
+        await leader
+    assert follower == b"ok"
+    assert calls == [b"ok"]
+
+
+@pytest.mark.asyncio
+async def test_micro_cache_and_invalidation():
+    """Тест: результат кэшируется на ttl и сбрасывается по владельцу."""
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    await flight.do(("user1",), slow_loader(b"v1", calls, delay=0))
+    cached = await flight.do(("user1",), slow_loader(b"v2", calls, delay=0))
+    flight.invalidate("user1")
+    fresh = await flight.do(("user1",), slow_loader(b"v3", calls, delay=0))
+
+    assert cached == b"v1"
+    assert fresh == b"v3"
+    assert flight.stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_only_owner_entries():
+    """Тест: сброс владельца не трогает записи других владельцев."""
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    await flight.do(("user1", "todo"), slow_loader(b"a", calls, delay=0))
+    await flight.do(("user1", "done"), slow_loader(b"b", calls, delay=0))
+    await flight.do(("user2", "todo"), slow_loader(b"c", calls, delay=0))
+    flight.invalidate("user1")
+
+    assert flight.stats()["cached"] == 1
+    assert await flight.do(("user2", "todo"), slow_loader(b"d", calls, delay=0)) == b"c"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_flight_does_not_cache_stale_result():
+    """Тест: результат запроса, начатого до изменения, не попадает в кэш."""
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    stale = asyncio.ensure_future(flight.do(("user1",), slow_loader(b"old", calls)))
+    await asyncio.sleep(0)
+    flight.invalidate("user1")
+    fresh = await flight.do(("user1",), slow_loader(b"new", calls))
+
+    assert await stale == b"old"
+    assert fresh == b"new"
+    assert await flight.do(("user1",), slow_loader(b"newer", calls, delay=0)) == b"new"
+
+
+@pytest.mark.asyncio
+async def test_full_cache_evicts_expired_entries():
+    """Тест: при заполненном кэше устаревшие записи удаляются, свежие сохраняются."""
+    flight = SingleFlight(ttl=60, max_entries=2)
+    calls = []
+
+    await flight.do(("user1", "a"), slow_loader(b"a", calls, delay=0))
+    await flight.do(("user2", "b"), slow_loader(b"b", calls, delay=0))
+    expires_at, body = flight._cache["user1"][("user1", "a")]
+    flight._cache["user1"][("user1", "a")] = (expires_at - 120, body)
+    await flight.do(("user3", "c"), slow_loader(b"c", calls, delay=0))
+
+    assert flight.stats()["cached"] == 2
+    assert set(flight._cache) == {"user2", "user3"}
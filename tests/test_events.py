@@ -0,0 +1,150 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+import app.events as events
+from app.events import (
+    RESYNC_MESSAGE,
+    PgTaskEventListener,
+    TaskEventBroker,
+    broker_stats,
+    dispatch_task_events,
+    notify_task_events,
+    stream_task_events,
+)
+from app.models.task import Task
+from app.schemas import TaskEvent, TaskEventType
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_by_owner():
+    """Тест: брокер доставляет события только подписчикам владельца."""
+    broker = TaskEventBroker(queue_size=4)
+    own = broker.subscribe("user1")
+    other = broker.subscribe("user2")
+
+    delivered = broker.publish(TaskEvent(type=TaskEventType.CREATED, task_id=1, owner_id="user1"))
+
+    assert delivered == 1
+    assert own.queue.qsize() == 1
+    assert other.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_broker_overflow_requests_resync():
+    """Тест: переполненная очередь заменяется сигналом resync."""
+    broker = TaskEventBroker(queue_size=2)
+    subscription = broker.subscribe("user1")
+    for task_id in range(3):
+        broker.publish(TaskEvent(type=TaskEventType.UPDATED, task_id=task_id, owner_id="user1"))
+
+    assert subscription.overflowed is True
+    assert subscription.queue.get_nowait() is None
+    assert broker_stats(broker)["dropped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events_batches_and_resyncs(monkeypatch):
+    """Тест: поток SSE склеивает накопленные события и завершается после resync."""
+    broker = TaskEventBroker(queue_size=2)
+    monkeypatch.setattr("app.events.broker", broker)
+    stream = stream_task_events("user1")
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    for task_id in range(3):
+        broker.publish(TaskEvent(type=TaskEventType.UPDATED, task_id=task_id, owner_id="user1"))
+
+    chunks = [await first] + [chunk async for chunk in stream]
+
+    assert chunks == [RESYNC_MESSAGE]
+    assert broker_stats(broker)["connections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events_batches_pending_messages(monkeypatch):
+    """Тест: накопившиеся события отправляются одним куском, закрытие потока снимает подписку."""
+    broker = TaskEventBroker(queue_size=4)
+    monkeypatch.setattr("app.events.broker", broker)
+    stream = stream_task_events("user1")
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    for task_id in range(2):
+        broker.publish(TaskEvent(type=TaskEventType.UPDATED, task_id=task_id, owner_id="user1"))
+
+    chunk = await first
+    await stream.aclose()
+
+    assert chunk.count("event: task") == 2
+    assert broker_stats(broker)["connections"] == 0
+
+
+def test_unread_stream_leaves_no_subscription(monkeypatch):
+    """Тест: поток, который не начали читать, не оставляет подписки."""
+    broker = TaskEventBroker(queue_size=4)
+    monkeypatch.setattr("app.events.broker", broker)
+
+    stream_task_events("user1")
+
+    assert broker_stats(broker)["connections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_notify_task_events_postgres_stays_in_transaction(monkeypatch):
+    """Тест: в режиме postgres NOTIFY выполняется в транзакции записи без своего коммита."""
+    monkeypatch.setattr("app.events.TASK_EVENTS_BACKEND", "postgres")
+    db = AsyncMock()
+
+    await notify_task_events(db, TaskEventType.CREATED, [Task(id=1, owner_id="user1")])
+
+    db.execute.assert_awaited_once()
+    assert db.execute.await_args.args[1]["payloads"] == [
+        TaskEvent(type=TaskEventType.CREATED, task_id=1, owner_id="user1").model_dump_json(),
+    ]
+    db.commit.assert_not_awaited()
+
+
+def test_dispatch_task_events_local(monkeypatch):
+    """Тест: локальный брокер получает события после коммита."""
+    broker = TaskEventBroker(queue_size=4)
+    monkeypatch.setattr("app.events.broker", broker)
+    subscription = broker.subscribe("user1")
+
+    dispatch_task_events(TaskEventType.DELETED, [Task(id=1, owner_id="user1")])
+
+    assert subscription.queue.qsize() == 1
+
+
+def test_dispatch_task_events_postgres_runs_listeners_only(monkeypatch):
+    """Тест: в режиме postgres обработчики воркера вызываются сразу, подписчики ждут NOTIFY."""
+    broker = TaskEventBroker(queue_size=4)
+    monkeypatch.setattr("app.events.broker", broker)
+    monkeypatch.setattr("app.events.TASK_EVENTS_BACKEND", "postgres")
+    listener = Mock()
+    broker.add_listener(listener)
+    subscription = broker.subscribe("user1")
+
+    dispatch_task_events(TaskEventType.UPDATED, [Task(id=1, owner_id="user1")])
+
+    listener.assert_called_once_with(TaskEvent(type=TaskEventType.UPDATED, task_id=1, owner_id="user1"))
+    assert subscription.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_and_requests_resync(monkeypatch):
+    """Тест: после обрыва соединения слушатель переподключается, подписчики получают resync."""
+    broker = TaskEventBroker(queue_size=4)
+    monkeypatch.setattr("app.events.broker", broker)
+    monkeypatch.setattr("app.events.TASK_EVENTS_RECONNECT_MIN_SECONDS", 0)
+    conn = Mock(add_listener=AsyncMock(), close=AsyncMock())
+    connect = AsyncMock(side_effect=[conn, OSError("connection refused"), conn])
+    monkeypatch.setattr(events.asyncpg, "connect", connect)
+    subscription = broker.subscribe("user1")
+
+    listener = PgTaskEventListener(dsn="postgresql://localhost/test")
+    await listener.start()
+    listener._on_terminate(conn)
+    await listener._reconnect_task
+
+    assert connect.await_count == 3
+    assert subscription.queue.get_nowait() is None
+    await listener.stop()
@@ -0,0 +1,189 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from datetime import datetime, timedelta, timezone
+
+from app.models.idempotency_key import IdempotencyKey
+from app.services.idempotency_service import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    hash_request,
+)
+
+TTL = timedelta(hours=1)
+LOCK = timedelta(seconds=35)
+
+
+def stored_key(request_hash, status_code=201, response_body='{"id": 1}', expires_in=TTL, locked_for=None):
+    """Возвращает сохранённый ключ идемпотентности."""
+    now = datetime.now(timezone.utc)
+    return IdempotencyKey(
+        owner_id="user1",
+        key="key-1",
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=response_body,
+        expires_at=now + expires_in,
+        locked_until=now + locked_for if locked_for is not None else None,
+    )
+
+
+def recording_handler(status_code=201, body='{"id": 1}'):
+    """Возвращает обработчик, записывающий ответ."""
+    return AsyncMock(side_effect=lambda record_response: record_response(status_code, body))
+
+
+@pytest.mark.asyncio
+async def test_run_executes_handler_and_stores_response(idempotency_service):
+    """Тест: первый запрос выполняется и сохраняет ответ."""
+    handler = recording_handler()
+
+    result = await idempotency_service.run("key-1", "hash", handler)
+
+    assert result == (201, '{"id": 1}', False)
+    handler.assert_awaited_once()
+    record = idempotency_service.db.add.call_args.args[0]
+    assert record.status_code == 201
+    assert record.response_body == '{"id": 1}'
+    assert record.locked_until is None
+    # Ответ пишется в транзакции обработчика: сервис коммитит только захват ключа.
+    idempotency_service.db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_claim_sets_short_lock(idempotency_service):
+    """Тест: незавершённый запрос блокирует ключ на короткий срок, а не на TTL."""
+    locks = []
+
+    async def handler(record_response):
+        record = idempotency_service.db.add.call_args.args[0]
+        locks.append(record.locked_until - datetime.now(timezone.utc))
+        record_response(201, "{}")
+
+    await idempotency_service.run("key-1", "hash", handler)
+
+    assert timedelta(0) < locks[0] <= LOCK
+
+
+@pytest.mark.asyncio
+async def test_run_replays_stored_response(idempotency_service):
+    """Тест: повтор получает сохранённый ответ без вызова обработчика."""
+    idempotency_service.db.get.return_value = stored_key("hash")
+    handler = AsyncMock()
+
+    result = await idempotency_service.run("key-1", "hash", handler)
+
+    assert result == (201, '{"id": 1}', True)
+    handler.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_different_request_raises(idempotency_service):
+    """Тест: ключ с другим телом запроса."""
+    idempotency_service.db.get.return_value = stored_key("other-hash")
+    with pytest.raises(IdempotencyKeyMismatchError):
+        await idempotency_service.run("key-1", "hash", AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_run_in_progress_raises(idempotency_service):
+    """Тест: ключ занят незавершённым запросом другого воркера."""
+    idempotency_service.db.get.return_value = stored_key(
+        "hash", status_code=None, response_body=None, locked_for=LOCK,
+    )
+    idempotency_service.db.execute.return_value = Mock(rowcount=0)
+    handler = AsyncMock()
+
+    with pytest.raises(IdempotencyKeyInProgressError):
+        await idempotency_service.run("key-1", "hash", handler)
+
+    handler.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_takes_over_expired_lock(idempotency_service):
+    """Тест: ключ упавшего воркера забирается после истечения блокировки."""
+    abandoned = stored_key("hash", status_code=None, response_body=None, locked_for=-LOCK)
+    idempotency_service.db.get.return_value = abandoned
+    idempotency_service.db.execute.return_value = Mock(rowcount=1)
+    handler = recording_handler(body='{"id": 3}')
+
+    result = await idempotency_service.run("key-1", "hash", handler)
+
+    assert result == (201, '{"id": 3}', False)
+    assert abandoned.status_code == 201
+    assert abandoned.locked_until is None
+    idempotency_service.db.add.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_expired_key_executes_again(idempotency_service):
+    """Тест: просроченный ключ удаляется, запрос выполняется заново."""
+    expired = stored_key("hash", expires_in=-TTL)
+    idempotency_service.db.get.return_value = expired
+    handler = recording_handler(body='{"id": 2}')
+
+    result = await idempotency_service.run("key-1", "hash", handler)
+
+    assert result == (201, '{"id": 2}', False)
+    idempotency_service.db.delete.assert_awaited_with(expired)
+
+
+@pytest.mark.asyncio
+async def test_run_coalesces_concurrent_duplicates(idempotency_service):
+    """Тест: одновременные повторы ждут первый запрос."""
+    calls = 0
+
+    async def handler(record_response):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        record_response(201, '{"id": 1}')
+
+    results = await asyncio.gather(*(
+        idempotency_service.run("key-1", "hash", handler) for _ in range(5)
+    ))
+
+    assert calls == 1
+    assert results[0] == (201, '{"id": 1}', False)
+    assert all(result == (201, '{"id": 1}', True) for result in results[1:])
+
+
+@pytest.mark.asyncio
+async def test_run_handler_error_releases_key(idempotency_service):
+    """Тест: ошибка обработчика освобождает ключ для повтора."""
+    handler = AsyncMock(side_effect=ValueError("bad"))
+
+    with pytest.raises(ValueError):
+        await idempotency_service.run("key-1", "hash", handler)
+
+    idempotency_service.db.rollback.assert_awaited()
+    idempotency_service.db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_cancelled_request_releases_key(idempotency_service):
+    """Тест: отмена запроса освобождает ключ и пробрасывается дальше."""
+    handler = AsyncMock(side_effect=asyncio.CancelledError())
+
+    with pytest.raises(asyncio.CancelledError):
+        await idempotency_service.run("key-1", "hash", handler)
+
+    idempotency_service.db.rollback.assert_awaited()
+    idempotency_service.db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_batches(idempotency_service):
+    """Тест: просроченные ключи удаляются пачками."""
+    idempotency_service.db.execute = AsyncMock(side_effect=[Mock(rowcount=2), Mock(rowcount=0)])
+
+    purged = await idempotency_service.purge_expired(batch_size=2)
+
+    assert purged == 2
+    assert idempotency_service.db.commit.await_count == 2
+
+
+def test_hash_request_is_order_independent():
+    """Тест: хэш не зависит от порядка ключей."""
+    assert hash_request({"a": 1, "b": 2}) == hash_request({"b": 2, "a": 1})
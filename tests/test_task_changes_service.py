@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models.task import Task
+from app.models.task_tombstone import TaskTombstone
+from app.services.task_changes_service import (
+    CHANGES_SAFETY_LAG,
+    ChangesTokenExpiredError,
+    TaskChangesService,
+    decode_changes_token,
+    encode_changes_token,
+)
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class SQLiteSession:
+    """Асинхронная обёртка над синхронной сессией SQLite с управляемым now()."""
+
+    def __init__(self, session, clock):
+        """Запоминает сессию и текущее время БД."""
+        self.session = session
+        self.clock = clock
+
+    async def execute(self, stmt):
+        """Выполняет запрос в SQLite."""
+        return self.session.execute(stmt)
+
+    async def scalar(self, stmt):
+        """Возвращает now() БД."""
+        return self.clock
+
+
+@pytest.fixture
+def sqlite_session():
+    """Возвращает синхронную сессию SQLite с созданными таблицами."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_list_changes_merges_batches(changes_service, sample_task, overdue_task):
+    """Тест: лента изменений упорядочивает задачи и удаления и выдаёт токен."""
+    now = datetime.now(timezone.utc)
+    sample_task.updated_at = now - timedelta(minutes=3)
+    overdue_task.updated_at = now - timedelta(minutes=1)
+    tombstone = TaskTombstone(id=7, task_id=5, owner_id="user1", deleted_at=now - timedelta(minutes=2))
+
+    tasks_result = Mock()
+    tasks_result.scalars.return_value.all.return_value = [sample_task, overdue_task]
+    tombstones_result = Mock()
+    tombstones_result.scalars.return_value.all.return_value = [tombstone]
+    changes_service.db.execute = AsyncMock(side_effect=[tasks_result, tombstones_result])
+    changes_service.db.scalar = AsyncMock(return_value=now)
+    since = encode_changes_token(None, (now - timedelta(hours=1), 0))
+
+    updated, deleted, token, has_more = await changes_service.list_changes(since=since, limit=2)
+
+    assert updated == [sample_task]
+    assert deleted == [tombstone]
+    assert has_more is True
+    tasks_cursor, tombstones_cursor = decode_changes_token(token)
+    assert tasks_cursor == (sample_task.updated_at, sample_task.id)
+    # Все отметки до горизонта выданы: курсор отметок сдвигается к горизонту.
+    assert tombstones_cursor == (now - CHANGES_SAFETY_LAG, 0)
+
+
+@pytest.mark.asyncio
+async def test_list_changes_delivers_late_commit(sqlite_session):
+    """Тест: изменение, закоммиченное после синхронизации с более старой меткой, не теряется."""
+    sqlite_session.add(Task(id=1, owner_id="user1", title="early", updated_at=NOW - timedelta(minutes=2)))
+    sqlite_session.add(Task(id=3, owner_id="user1", title="recent", updated_at=NOW - timedelta(seconds=5)))
+    sqlite_session.commit()
+
+    db = SQLiteSession(sqlite_session, clock=NOW)
+    service = TaskChangesService(db, "user1")
+    updated, _, token, _ = await service.list_changes()
+    assert [task.id for task in updated] == [1]
+
+    # Транзакция началась за 10 секунд до синхронизации, а закоммитилась после неё.
+    sqlite_session.add(Task(id=2, owner_id="user1", title="late", updated_at=NOW - timedelta(seconds=10)))
+    sqlite_session.commit()
+
+    db.clock = NOW + timedelta(minutes=1)
+    updated, _, _, _ = await service.list_changes(since=token)
+    assert [task.id for task in updated] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_first_sync_skips_deletion_history(sqlite_session):
+    """Тест: первая синхронизация не отдаёт старые удаления, последующие — только новые."""
+    sqlite_session.add(TaskTombstone(task_id=1, owner_id="user1", deleted_at=NOW - timedelta(days=3)))
+    sqlite_session.add(TaskTombstone(task_id=2, owner_id="user1", reason="archived", deleted_at=NOW - timedelta(days=1)))
+    sqlite_session.commit()
+
+    db = SQLiteSession(sqlite_session, clock=NOW)
+    service = TaskChangesService(db, "user1")
+    _, deleted, token, has_more = await service.list_changes()
+    assert deleted == []
+    assert has_more is False
+
+    sqlite_session.add(TaskTombstone(task_id=3, owner_id="user1", deleted_at=NOW + timedelta(minutes=1)))
+    sqlite_session.commit()
+
+    db.clock = NOW + timedelta(minutes=5)
+    _, deleted, _, _ = await service.list_changes(since=token)
+    assert [tombstone.task_id for tombstone in deleted] == [3]
+
+
+@pytest.mark.asyncio
+async def test_list_changes_expired_token_requires_full_resync(changes_service):
+    """Тест: токен старше срока хранения отметок требует полной синхронизации."""
+    changes_service.db.scalar = AsyncMock(return_value=NOW)
+    since = encode_changes_token(None, (NOW - timedelta(days=60), 0))
+
+    with pytest.raises(ChangesTokenExpiredError):
+        await changes_service.list_changes(since=since)
+
+
+@pytest.mark.asyncio
+async def test_token_without_deletions_stays_fresh(sqlite_session):
+    """Тест: регулярная синхронизация без удалений не делает токен устаревшим."""
+    db = SQLiteSession(sqlite_session, clock=NOW)
+    service = TaskChangesService(db, "user1")
+    _, _, token, _ = await service.list_changes()
+
+    for days in (20, 40, 60):
+        db.clock = NOW + timedelta(days=days)
+        _, _, token, _ = await service.list_changes(since=token)
+
+    _, tombstones_cursor = decode_changes_token(token)
+    assert tombstones_cursor[0] > NOW + timedelta(days=59)
+
+
+@pytest.mark.asyncio
+async def test_list_changes_invalid_token_raises(changes_service):
+    """Тест: повреждённый токен синхронизации."""
+    with pytest.raises(ValueError):
+        await changes_service.list_changes(since="not-a-token")
+
+
+@pytest.mark.asyncio
+async def test_purge_tombstones_batches(changes_service):
+    """Тест: устаревшие отметки удаляются пачками."""
+    changes_service.db.execute = AsyncMock(side_effect=[Mock(rowcount=2), Mock(rowcount=1)])
+
+    purged = await changes_service.purge_tombstones(batch_size=2)
+
+    assert purged == 3
+    assert changes_service.db.commit.await_count == 2
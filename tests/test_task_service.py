@@ -1,8 +1,60 @@
 import pytest
 from unittest.mock import AsyncMock, Mock
+from datetime import datetime, timedelta, timezone
 
-from app.models.task import StatusEnum
-from app.schemas import TaskUpdate, TaskCreate
+from sqlalchemy import create_engine, delete, func, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db import Base
+from app.models.task import StatusEnum, Task, TaskArchive
+from app.models.task_tombstone import TaskTombstone
+from app.schemas import TaskCreate, TaskEventType, TaskUpdate
+from app.services.task_service import TaskConflictError, TaskNotFoundError, TaskService
+
+
+class SyncSessionAdapter:
+    """Асинхронная обёртка над синхронной сессией SQLite."""
+
+    def __init__(self, session):
+        """Запоминает сессию."""
+        self.session = session
+
+    def add(self, instance):
+        """Добавляет объект в сессию."""
+        self.session.add(instance)
+
+    async def delete(self, instance):
+        """Помечает объект на удаление."""
+        self.session.delete(instance)
+
+    async def commit(self):
+        """Коммитит транзакцию."""
+        self.session.commit()
+
+    async def rollback(self):
+        """Откатывает транзакцию."""
+        self.session.rollback()
+
+    async def scalar(self, stmt):
+        """Выполняет запрос и возвращает скаляр."""
+        return self.session.scalar(stmt)
+
+    async def execute(self, stmt):
+        """Выполняет запрос."""
+        return self.session.execute(stmt)
+
+
+@pytest.fixture
+def sqlite_session():
+    """Возвращает синхронную сессию SQLite с одной задачей пользователя."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        session.add(Task(id=1, owner_id="user1", title="Task"))
+        session.commit()
+        yield session
 
 
 @pytest.mark.asyncio
@@ -16,6 +68,20 @@ async def test_create_task_success(task_service, task_create_payload):
     task_service.db.refresh.assert_awaited()
 
 
+@pytest.mark.asyncio
+async def test_create_task_before_commit_in_same_transaction(task_service, task_create_payload):
+    """Тест: связанные данные записываются до коммита создания задачи."""
+    calls = []
+    task_service.db.commit.side_effect = lambda: calls.append("commit")
+
+    task = await task_service.create_task(
+        task_create_payload,
+        before_commit=lambda created: calls.append(created),
+    )
+
+    assert calls == [task, "commit"]
+
+
 @pytest.mark.asyncio
 async def test_create_task_done_without_due_date_raises(task_service):
     """Тест создания задачи со статусом DONE без due_date."""
@@ -74,6 +140,34 @@ async def test_delete_task(task_service, sample_task):
     task_service.db.commit.assert_awaited()
 
 
+@pytest.mark.asyncio
+async def test_delete_task_after_concurrent_update_raises_conflict(sqlite_session, dispatched_events):
+    """Тест: удаление задачи, изменённой после чтения, откатывается с конфликтом."""
+    task = sqlite_session.get(Task, 1)
+    sqlite_session.execute(
+        update(Task).where(Task.id == 1).values(version=Task.version + 1).execution_options(synchronize_session=False),
+    )
+    sqlite_session.commit()
+
+    with pytest.raises(TaskConflictError):
+        await TaskService(SyncSessionAdapter(sqlite_session), "user1").delete_task(task)
+
+    assert sqlite_session.scalar(select(func.count()).select_from(Task)) == 1
+    assert sqlite_session.query(TaskTombstone).count() == 0
+    dispatched_events.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_delete_task_already_gone_raises_not_found(sqlite_session):
+    """Тест: удаление задачи, которую уже удалил или архивировал другой запрос."""
+    task = sqlite_session.get(Task, 1)
+    sqlite_session.execute(delete(Task).where(Task.id == 1))
+    sqlite_session.commit()
+
+    with pytest.raises(TaskNotFoundError):
+        await TaskService(SyncSessionAdapter(sqlite_session), "user1").delete_task(task)
+
+
 @pytest.mark.asyncio
 async def test_list_tasks(task_service, sample_task, overdue_task, future_task):
     """Тест получения списка задач."""
@@ -83,6 +177,7 @@ async def test_list_tasks(task_service, sample_task, overdue_task, future_task):
     scalars_mock = Mock()
     scalars_mock.all.return_value = tasks
     execute_result_mock.scalars.return_value = scalars_mock
+    execute_result_mock.scalar_one.return_value = 3
 
     task_service.db.execute = AsyncMock(return_value=execute_result_mock)
 
@@ -93,30 +188,138 @@ async def test_list_tasks(task_service, sample_task, overdue_task, future_task):
 
 
 @pytest.mark.asyncio
-async def test_recalculate_overdue(task_service, sample_task):
-    """Тест recalculate_overdue."""
+async def test_recalculate_overdue(task_service, overdue_task, notified_events, dispatched_events):
+    """Тест recalculate_overdue: один UPDATE с повышением версии и события по изменённым задачам."""
+    changed = [Mock(id=overdue_task.id, owner_id=overdue_task.owner_id)]
     execute_result_mock = Mock()
-    scalars_mock = Mock()
-    scalars_mock.all.return_value = [sample_task]
-    execute_result_mock.scalars.return_value = scalars_mock
-
+    execute_result_mock.all.return_value = changed
     task_service.db.execute = AsyncMock(return_value=execute_result_mock)
 
     updated_count = await task_service.recalculate_overdue()
-    assert updated_count >= 0
+
+    assert updated_count == 1
     task_service.db.execute.assert_called_once()
-    scalars_mock.all.assert_called_once()
+    sql = str(task_service.db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE tasks SET")
+    assert "version=(tasks.version + " in sql
+    assert "RETURNING tasks.id, tasks.owner_id" in sql
+    task_service.db.commit.assert_awaited_once()
+    notified_events.assert_awaited_once_with(task_service.db, TaskEventType.UPDATED, changed)
+    dispatched_events.assert_called_once_with(TaskEventType.UPDATED, changed)
 
 
 @pytest.mark.asyncio
-async def test_recalculate_overdue_none_updated(task_service, future_task):
+async def test_recalculate_overdue_none_updated(task_service):
     """Тест пересчёта просроченных задач, когда нет изменений."""
     execute_result_mock = Mock()
-    scalars_mock = Mock()
-    scalars_mock.all.return_value = [future_task]
-    execute_result_mock.scalars.return_value = scalars_mock
+    execute_result_mock.all.return_value = []
     task_service.db.execute = AsyncMock(return_value=execute_result_mock)
 
     updated = await task_service.recalculate_overdue()
     assert updated == 0
-    assert future_task.is_overdue is False
+
+
+@pytest.mark.asyncio
+async def test_delete_task_creates_tombstone(task_service, sample_task):
+    """Тест: удаление задачи оставляет отметку для ленты изменений."""
+    task_service.db.add = Mock()
+    await task_service.delete_task(sample_task)
+    tombstone = task_service.db.add.call_args.args[0]
+    assert isinstance(tombstone, TaskTombstone)
+    assert tombstone.task_id == sample_task.id
+    assert tombstone.owner_id == sample_task.owner_id
+
+
+@pytest.mark.asyncio
+async def test_update_task_publishes_event(task_service, sample_task, notified_events, dispatched_events):
+    """Тест: NOTIFY идёт в транзакции записи, доставка в брокер — после коммита."""
+    calls = []
+    notified_events.side_effect = lambda *args: calls.append("notify")
+    task_service.db.commit.side_effect = lambda: calls.append("commit")
+    dispatched_events.side_effect = lambda *args: calls.append("dispatch")
+
+    await task_service.update_task(sample_task, TaskUpdate(title="Renamed"))
+
+    assert calls == ["notify", "commit", "dispatch"]
+    notified_events.assert_awaited_once_with(task_service.db, TaskEventType.UPDATED, [sample_task])
+    dispatched_events.assert_called_once_with(TaskEventType.UPDATED, [sample_task])
+
+
+@pytest.mark.asyncio
+async def test_update_task_stale_version_raises(task_service, sample_task):
+    """Тест: обновление с устаревшей версией задачи."""
+    sample_task.version = 3
+    with pytest.raises(TaskConflictError):
+        await task_service.update_task(sample_task, TaskUpdate(title="New", version=2))
+    task_service.db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_update_task_concurrent_change_raises(task_service, sample_task):
+    """Тест: условный UPDATE не нашёл строку с ожидаемой версией."""
+    sample_task.version = 3
+    task_service.db.commit = AsyncMock(side_effect=StaleDataError())
+    with pytest.raises(TaskConflictError):
+        await task_service.update_task(sample_task, TaskUpdate(title="New", version=3))
+    task_service.db.rollback.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_task_falls_back_to_archive(task_service, sample_task):
+    """Тест: задача ищется в архиве только по запросу."""
+    missing = Mock()
+    missing.scalar_one_or_none.return_value = None
+    archived = Mock()
+    archived.scalar_one_or_none.return_value = sample_task
+    task_service.db.execute = AsyncMock(side_effect=[missing, archived])
+
+    task = await task_service.get_task(sample_task.id, include_archived=True)
+
+    assert task == sample_task
+    assert task_service.db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_include_archived_pages_in_database(sqlite_session):
+    """Тест: список с архивом сортируется и листается одним запросом по обеим таблицам."""
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    sqlite_session.execute(delete(Task))
+    for task_id in range(1, 7):
+        model = TaskArchive if task_id % 2 else Task
+        sqlite_session.add(model(
+            id=task_id,
+            owner_id="user1",
+            title=f"Task {task_id}",
+            created_at=created + timedelta(hours=task_id),
+        ))
+    sqlite_session.add(TaskArchive(id=7, owner_id="user2", title="Foreign", created_at=created))
+    sqlite_session.commit()
+    service = TaskService(SyncSessionAdapter(sqlite_session), "user1")
+
+    total, items = await service.list_tasks(limit=3, offset=2, include_archived=True)
+
+    assert total == 6
+    assert [item.id for item in items] == [4, 3, 2]
+    assert [item.title for item in items] == ["Task 4", "Task 3", "Task 2"]
+
+
+@pytest.mark.asyncio
+async def test_archive_done_tasks_moves_batches(task_service, notified_events, dispatched_events):
+    """Тест: архивация повторяет пачки, пока пачка заполнена, и публикует события archived."""
+    batches = [
+        [Mock(id=1, owner_id="user1"), Mock(id=2, owner_id="user1")],
+        [Mock(id=3, owner_id="user2"), Mock(id=4, owner_id="user1")],
+        [Mock(id=5, owner_id="user2")],
+    ]
+    task_service.db.execute = AsyncMock(
+        side_effect=[Mock(all=Mock(return_value=batch)) for batch in batches],
+    )
+
+    archived = await task_service.archive_done_tasks(timedelta(days=30), batch_size=2)
+
+    assert archived == 5
+    assert task_service.db.commit.await_count == 3
+    sql = str(task_service.db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO task_tombstones (task_id, owner_id, reason)" in sql
+    assert notified_events.await_count == 3
+    dispatched_events.assert_called_with(TaskEventType.ARCHIVED, batches[-1])